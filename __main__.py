@@ -1,9 +1,10 @@
 import argparse
-import importlib.util
-import inspect
 import json
+import logging
 import sys
 from import_data import *
+from observers import LoggingObserver
+from replication import ModelConfig, replicate
 
 parser = argparse.ArgumentParser(prog='Model of sorting center', allow_abbrev=True)
 
@@ -31,8 +32,8 @@ parser.add_argument('-mode', required=True,# metavar="MODE",
                     help="mode to run. "
                          "RUN: runs model for time, outputs number of delibered mails; "
                          "RECORD: record all robots' action in csv; "
-                         "AVERAGE: runs model for time several times to determine\n"
-                         "average and standard deviation;"
+                         "AVERAGE: runs independent models for time in parallel to determine\n"
+                         "average, standard deviation and 95% confidence interval;"
 )
 parser.add_argument('-time', required=True, type=int,
                     help='model time to execute')
@@ -40,51 +41,60 @@ parser.add_argument('-output', '-o', type=argparse.FileType('w'),
                     help='file to output', default=sys.stdout)
 parser.add_argument('-count', '-c', type=int,
                     help='how many time will be executed to calculate average, for -mode=average')
+parser.add_argument('-binary', action='store_true',
+                    help='for -mode=record, record in compact binary format, '
+                         'convert it to csv with `python action_log.py`')
+parser.add_argument('-compress', action='store_true',
+                    help='for -mode=record -binary, compress recorded actions')
+parser.add_argument('-workers', '-w', type=int,
+                    help='number of processes for -mode=average, by default number of processors')
+parser.add_argument('-seed', '-s', type=int, default=0,
+                    help='seed of the first replication for -mode=average, '
+                         'next replications use next seeds')
+parser.add_argument('-log', '-l', action='store_true',
+                    help='for -mode=run and -mode=record, log robots\' actions to stderr')
 
-args = parser.parse_args()
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.log:
+        logging.basicConfig(level=logging.INFO)
 
-# import algorithm
-spec = importlib.util.spec_from_file_location("algorithm", args.algorithm)
-algorithm = importlib.util.module_from_spec(spec)
-sys.modules["algorithm"] = algorithm
-spec.loader.exec_module(algorithm)
+    # import algorithm
+    brains = import_brains(args.algorithm)
+    if len(brains) == 0:
+        print("No algorithm was found: ", file=sys.stderr)
+        raise SystemExit(1)
+    if len(brains) > 1:
+        print(f"More than one algorithm were found: ", file=sys.stderr, end='')
+        print(*(i.__name__ for i in brains), file=sys.stderr, sep=', ')
+        raise SystemExit(1)
 
-# find brain
-brains = []
-for name, obj in inspect.getmembers(algorithm):
-    if (inspect.isclass(obj)
-            and 'Brain' in (i.__name__ for i in obj.__mro__)
-            and name != "Brain"
-            and name != "OnlineBrain"):
-        brains.append(obj)
-if len(brains) == 0:
-    print("No algorithm was found: ", file=sys.stderr)
-    raise SystemExit(1)
-if len(brains) > 1:
-    print(f"More than one algorithm were found: ", file=sys.stderr, end='')
-    print(*(i.__name__ for i in brains), file=sys.stderr, sep=', ')
-    raise SystemExit(1)
+    # import
+    config = ModelConfig(json.load(args.map), json.load(args.type), json.load(args.position),
+                         json.load(args.distribution), args.algorithm)
 
-# import
-model = Model()
-factory = import_distributions(model, json.load(args.distribution), *import_map_stations(json.load(args.map)))
-args.map.seek(0)
-map_ = import_map(model, json.load(args.map), factory)[0]
-model.set_map(map_)
-robot_type = import_robot_type(json.load(args.type))
-model.set_brain(brains[0](model))
-model.add_robots(import_robots(model, json.load(args.position), robot_type))
-
-# run
-match args.mode:
-    case "run":
-        model.run(args.time)
-        print(model.delivered_mails, file=args.output)
-    case "record":
-        model.record_actions_for_time(args.time, args.output)
-    case "average":
-        if args.count is None:
-            parser.error("count must be presented in -mode=average")
-        if args.count < 2:
-            parser.error("count must be greater than 2")
-        print(*model.test(args.time, args.count), file=args.output)
+    # run
+    match args.mode:
+        case "run":
+            model = import_model(config.map, config.robot_type, config.position,
+                                 config.distribution, brains[0])
+            if args.log:
+                model.subscribe(LoggingObserver())
+            model.run(args.time)
+            print(model.delivered_mails, file=args.output)
+        case "record":
+            model = import_model(config.map, config.robot_type, config.position,
+                                 config.distribution, brains[0])
+            if args.log:
+                model.subscribe(LoggingObserver())
+            if args.binary:
+                model.record_actions_for_time(args.time, args.output.buffer, True, args.compress)
+            else:
+                model.record_actions_for_time(args.time, args.output)
+        case "average":
+            if args.count is None:
+                parser.error("count must be presented in -mode=average")
+            if args.count < 2:
+                parser.error("count must be greater than 2")
+            result = replicate(config, args.time, args.count, args.seed, workers=args.workers)
+            print(result.mean, result.std, *result.confidence_interval(), file=args.output)
@@ -0,0 +1,182 @@
+import array
+import csv
+import struct
+import sys
+import typing
+import zlib
+
+from structures import Direction
+from observers import Observer
+
+if typing.TYPE_CHECKING:
+    import io
+    from robot import Robot
+    from structures import Position, Mail
+
+HEADER = ("time", "robot",
+          "x", "y", "direction", "mail",
+          "action", "time to do",
+          "new x", "new y", "new direction", "new mail")
+# fixed width type of each column, `None` mail is -1, direction and action are their values
+TYPECODES = ('d', 'i',
+             'i', 'i', 'b', 'i',
+             'b', 'd',
+             'i', 'i', 'b', 'i')
+
+_MAGIC = b"RSAL"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sBBc")
+_CHUNK_HEADER = struct.Struct("<II")
+
+
+def _number(value: float) -> float:
+    return int(value) if value.is_integer() else value
+
+
+class CsvActionWriter(Observer):
+    """Writes each action as a csv row"""
+    def __init__(self, file: "io.TextIOWrapper"):
+        self._file = file
+        self._writer = csv.writer(file)
+        self._writer.writerow(HEADER)
+
+    @typing.override
+    def on_action(self, time: float, robot: "Robot[typing.Any]",
+                  current_position: "Position",
+                  current_direction: Direction,
+                  current_mail: "Mail | None",
+                  action: "Robot.Action",
+                  time_to_do: float,
+                  expected_position: "Position",
+                  expected_direction: Direction,
+                  expected_mail: "Mail | None"):
+        self._writer.writerow((
+            time, robot.id,
+            current_position.x, current_position.y, current_direction.name,
+            None if current_mail is None else current_mail.destination,
+            action.name, time_to_do,
+            expected_position.x, expected_position.y, expected_direction.name,
+            None if expected_mail is None else expected_mail.destination))
+
+    @typing.override
+    def flush(self):
+        self._file.flush()
+
+
+class ActionLogWriter(Observer):
+    """Writes actions in binary columnar format:
+    file header, then chunks of `chunk_size` actions,
+    each chunk is every column as array of `TYPECODES`, optionally compressed."""
+    def __init__(self, file: typing.BinaryIO, chunk_size: int = 1 << 16,
+                 compress: bool = False):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._compress = compress
+        self._columns = tuple(array.array(typecode) for typecode in TYPECODES)
+        file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, compress,
+                                     b'<' if sys.byteorder == 'little' else b'>'))
+
+    @typing.override
+    def on_action(self, time: float, robot: "Robot[typing.Any]",
+                  current_position: "Position",
+                  current_direction: Direction,
+                  current_mail: "Mail | None",
+                  action: "Robot.Action",
+                  time_to_do: float,
+                  expected_position: "Position",
+                  expected_direction: Direction,
+                  expected_mail: "Mail | None"):
+        (time_, robot_, x, y, direction, mail, action_, time_to_do_,
+         new_x, new_y, new_direction, new_mail) = self._columns
+        time_.append(time)
+        robot_.append(robot.id)
+        x.append(current_position.x)
+        y.append(current_position.y)
+        direction.append(current_direction.value)
+        mail.append(-1 if current_mail is None else current_mail.destination)
+        action_.append(action.value)
+        time_to_do_.append(time_to_do)
+        new_x.append(expected_position.x)
+        new_y.append(expected_position.y)
+        new_direction.append(expected_direction.value)
+        new_mail.append(-1 if expected_mail is None else expected_mail.destination)
+        if len(time_) >= self._chunk_size:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        count = len(self._columns[0])
+        if count == 0:
+            return
+        data = b"".join(column.tobytes() for column in self._columns)
+        if self._compress:
+            data = zlib.compress(data)
+        self._file.write(_CHUNK_HEADER.pack(count, len(data)))
+        self._file.write(data)
+        for column in self._columns:
+            del column[:]
+
+    @typing.override
+    def flush(self):
+        """writes buffered actions"""
+        self._write_chunk()
+        self._file.flush()
+
+
+class ActionLogReader:
+    """Reads file written by `ActionLogWriter`"""
+    def __init__(self, file: typing.BinaryIO):
+        self._file = file
+        magic, version, compressed, byteorder = _FILE_HEADER.unpack(
+            file.read(_FILE_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Not an action log.")
+        self._compressed = bool(compressed)
+        self._swap = byteorder != (b'<' if sys.byteorder == 'little' else b'>')
+
+    def chunks(self) -> "typing.Iterator[tuple[array.array[typing.Any], ...]]":
+        """yields columns (in order of `HEADER`) of each chunk"""
+        while header := self._file.read(_CHUNK_HEADER.size):
+            count, size = _CHUNK_HEADER.unpack(header)
+            data = self._file.read(size)
+            if self._compressed:
+                data = zlib.decompress(data)
+            columns: list[array.array[typing.Any]] = []
+            start = 0
+            for typecode in TYPECODES:
+                column = array.array(typecode)
+                end = start + count * column.itemsize
+                column.frombytes(data[start:end])
+                if self._swap:
+                    column.byteswap()
+                columns.append(column)
+                start = end
+            yield tuple(columns)
+
+    def __iter__(self) -> typing.Iterator[tuple[typing.Any, ...]]:
+        """yields actions as rows of csv"""
+        from robot import Robot
+        directions = {direction.value: direction.name for direction in Direction}
+        actions = {action.value: action.name for action in Robot.Action}
+        for (time, robot, x, y, direction, mail, action, time_to_do,
+             new_x, new_y, new_direction, new_mail) in self.chunks():
+            for row in zip(time, robot, x, y, direction, mail, action, time_to_do,
+                           new_x, new_y, new_direction, new_mail):
+                yield (_number(row[0]), row[1], row[2], row[3], directions[row[4]],
+                       None if row[5] == -1 else row[5],
+                       actions[row[6]], _number(row[7]),
+                       row[8], row[9], directions[row[10]],
+                       None if row[11] == -1 else row[11])
+
+    def to_csv(self, file: "io.TextIOWrapper"):
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        writer.writerows(self)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Converts binary action log to csv")
+    parser.add_argument('input', type=argparse.FileType('rb'))
+    parser.add_argument('output', type=argparse.FileType('w'), nargs='?', default=sys.stdout)
+    args = parser.parse_args()
+    ActionLogReader(args.input).to_csv(args.output)
@@ -1,4 +1,6 @@
 import dataclasses
+import heapq
+import itertools
 import typing
 
 AgentT = typing.TypeVar("AgentT")
@@ -86,6 +88,93 @@ class MinHeap(typing.Generic[T, PriorityT]):
     __next__ = dequeue
 
 
+class LazyHeap(typing.Generic[T, PriorityT]):
+    """
+    `heapq` based queue. When priority is changed old entry stays in the heap
+    and is skipped on dequeue.
+    """
+    def __init__(self, values: typing.Iterable[tuple[T, PriorityT]] = ()):
+        self._heap: list[tuple[PriorityT, int, T]] = []
+        self._priorities: dict[T, PriorityT] = {}
+        self._counter = itertools.count()
+        for value, priority in values:
+            self[value] = priority
+
+    def __len__(self):
+        return len(self._priorities)
+
+    def __getitem__(self, value: T, /) -> PriorityT:
+        return self._priorities[value]
+
+    def __setitem__(self, value: T, priority: PriorityT):
+        self._priorities[value] = priority
+        heapq.heappush(self._heap, (priority, next(self._counter), value))
+
+    def __contains__(self, value: T, /):
+        return value in self._priorities
+
+    def dequeue(self) -> tuple[T, PriorityT]:
+        while self._heap:
+            priority, _, value = heapq.heappop(self._heap)
+            if value in self._priorities and self._priorities[value] == priority:
+                del self._priorities[value]
+                return value, priority
+        raise StopIteration("Heap is empty")
+
+    def __iter__(self) -> typing.Iterator[tuple[T, PriorityT]]:
+        return self
+
+    __next__ = dequeue
+
+
+class BucketQueue(typing.Generic[T, PriorityT]):
+    """
+    Values with equal priority are kept in one bucket, heap is only over distinct priorities,
+    so it is faster than `LazyHeap` when there are few of them (as integer times).
+    Entries with changed priority are skipped on dequeue.
+    """
+    def __init__(self, values: typing.Iterable[tuple[T, PriorityT]] = ()):
+        self._buckets: dict[PriorityT, list[T]] = {}
+        self._keys: list[PriorityT] = []
+        self._priorities: dict[T, PriorityT] = {}
+        for value, priority in values:
+            self[value] = priority
+
+    def __len__(self):
+        return len(self._priorities)
+
+    def __getitem__(self, value: T, /) -> PriorityT:
+        return self._priorities[value]
+
+    def __setitem__(self, value: T, priority: PriorityT):
+        self._priorities[value] = priority
+        if (bucket := self._buckets.get(priority)) is None:
+            self._buckets[priority] = bucket = []
+            heapq.heappush(self._keys, priority)
+        bucket.append(value)
+
+    def __contains__(self, value: T, /):
+        return value in self._priorities
+
+    def dequeue(self) -> tuple[T, PriorityT]:
+        while self._keys:
+            priority = self._keys[0]
+            bucket = self._buckets[priority]
+            while bucket:
+                value = bucket.pop()
+                if value in self._priorities and self._priorities[value] == priority:
+                    del self._priorities[value]
+                    return value, priority
+            del self._buckets[priority]
+            heapq.heappop(self._keys)
+        raise StopIteration("Queue is empty")
+
+    def __iter__(self) -> typing.Iterator[tuple[T, PriorityT]]:
+        return self
+
+    __next__ = dequeue
+
+
 @dataclasses.dataclass(slots=True, eq=False)
 class TrueItem(typing.Generic[T]):
     val: T
@@ -189,7 +278,7 @@ def restore_path(start: VertexT, end: VertexT,
 
 def a_star(edges: typing.Callable[[VertexT, float], typing.Iterable[PathSpan[VertexT]]],
            distance: typing.Callable[[VertexT], float],
-           end_check: typing.Callable[[VertexT], bool],
+           end_check: typing.Callable[[VertexT, float], bool],
            start: VertexT,
            start_time: float,
            priorityQueue: type[PriorityQueue[VertexT, float]] = MinHeap
@@ -199,7 +288,7 @@ def a_star(edges: typing.Callable[[VertexT, float], typing.Iterable[PathSpan[Ver
     used = set[VertexT]()
     answer: dict[VertexT, PathSpan[VertexT]] = {start: PathSpan(start, start, 0, start_time)}
     for vertex_from, _ in queue:
-        if end_check(vertex_from):
+        if end_check(vertex_from, answer[vertex_from].end):
             break
         used.add(vertex_from)
         for path_span in edges(vertex_from, answer[vertex_from].end):
@@ -1,133 +1,153 @@
+import array
+import bisect
+import itertools
 import random
 import typing
 
 from brains.brain import OnlineBrain
 from robot import Robot, SafeRobot
-from structures import Map, RobotType, Position, Direction
+from structures import Map, RobotType, Direction
 from modelling import Model
 from cell import SafeCell
 
+SLOTS = 4 # actions in state: move and turns
+
+
 class AntBrain(OnlineBrain[Map[SafeCell]]):
     class _Pheromones:
-        def __init__(self, p: float, q: float, rho: float,
-                     times: typing.Sequence[float],
-                     next_: "typing.Sequence[Robot.Action]"):
-            self._p = p
-            self._q = q
+        """
+        pheromones for each goal id, cell, direction and action
+        in flat arrays, `SLOTS` values for each `(id, cell, direction)`
+        """
+        def __init__(self, ids: typing.Sequence[int], size: int, rho: float):
             self._rho = rho
-            self._times = times
-            self._pheromones = [1.0 for _ in times]
-            self._next = next_
-            self.to_update: typing.Final = [0.0]*len(times)
-
-        def get(self):
-            weights: list[float] = []
-            for pher, time in zip(self._pheromones, self._times):
-                weights.append(pher**self._p / time**self._p)
-            res = random.choices(range(len(self._next)), weights)[0]
-            return res, self._next[res]
+            self._offsets = {id_: i*size*4*SLOTS for i, id_ in enumerate(ids)}
+            self.pheromones: typing.Final = array.array('d', [1.0]) * (len(ids)*size*4*SLOTS)
+            self.to_update: typing.Final = array.array('d', [0.0]) * len(self.pheromones)
+            # cumulative weights of actions by index of state, valid until `update`
+            self._cumulative: dict[int, list[float]] = {}
+
+        def index(self, id_: int, cell: int, direction: Direction) -> int:
+            """index of the first action of the state"""
+            return self._offsets[id_] + (cell*4 + direction.value)*SLOTS
+
+        def cumulative(self, index: int, times: typing.Sequence[float], p: float) -> list[float]:
+            """cumulative weights of actions of the state with first action at `index`"""
+            if (result := self._cumulative.get(index)) is None:
+                values = self.pheromones
+                result = self._cumulative[index] = list(itertools.accumulate(
+                    values[index + i]**p / time**p for i, time in enumerate(times)))
+            return result
 
         def update(self):
+            self._cumulative.clear()
+            pheromones = self.pheromones
+            keep = 1 - self._rho
             for i, val in enumerate(self.to_update):
-                self._pheromones[i] = (1-self._rho)*self._pheromones[i] + val
+                pheromones[i] = keep*pheromones[i] + val
 
     def __init__(self, model: "Model[Map[SafeCell], typing.Self, SafeRobot]",
                  robot_type: RobotType, q: float, p: float, rho: float,
-                 Q: float):
+                 Q: float, random_block: int = 0):
         """
         param q: greed, power of inverse time, > 0
         param p: herd, power of pheromone, > 1
         param rho: pheromone evaporation coefficient, 0 < ... < 1
         param Q: constant to add, > 0
+        param random_block: if positive, random numbers are drawn by blocks of this size
         """
-        def new_pheromones(ids: typing.Iterable[int]):
-            def actions(position: Position, direction: Direction):
-                times: list[float] = []
-                acts: list[Robot.Action] = []
-                if (model.map.has(position.get_next_on(direction))
-                        and model.map[position.get_next_on(direction)].free):
-                    times.append(robot_type.time_to_move)
-                    acts.append(Robot.Action.move)
-                for new_direction in Direction:
-                    if new_direction != direction and model.map.has(position.get_next_on(new_direction)):
-                        times.append(robot_type.time_to_turn)
-                        acts.append(Robot.Action.turn_to(new_direction))
-                return (times, acts)
-            return {
-                (id_, Position(x, y), direc):
-                    AntBrain._Pheromones(p, q, rho, *actions(Position(x, y), direc))
-                for id_ in ids
-                for x in range(model.map.n)
-                for y in range(model.map.m)
-                for direc in Direction            
-            }
+        def actions(cell: int, direction: Direction):
+            times: list[float] = []
+            acts: list[Robot.Action] = []
+            if model.map.successor(cell, direction) != -1:
+                times.append(robot_type.time_to_move)
+                acts.append(Robot.Action.move)
+            for new_direction in Direction:
+                if new_direction != direction and model.map.successor(cell, new_direction) != -1:
+                    times.append(robot_type.time_to_turn)
+                    acts.append(Robot.Action.turn_to(new_direction))
+            return (tuple(times), tuple(acts))
 
         super().__init__(model)
         self._q = q
         self._p = p
         self._rho = rho
         self._Q = Q
-
-        self._to_inputs = new_pheromones(model.map.input_ids)
-        self._to_outputs = new_pheromones(model.map.output_ids)
+        self._random_block = random_block
+        self._randoms: list[float] = []
+
+        # times and actions for each `cell*4 + direction.value`
+        self._actions = [actions(cell, direction)
+                         for cell in range(model.map.size) for direction in Direction]
+        self._to_inputs = AntBrain._Pheromones(model.map.input_ids, model.map.size, rho)
+        self._to_outputs = AntBrain._Pheromones(model.map.output_ids, model.map.size, rho)
         self._last = 0
+        # pheromones and index of given action
         self._given_actions: dict[SafeRobot, list[tuple[AntBrain._Pheromones, int]]] = {}
         self._start_time: dict[SafeRobot, float] = {}
 
-        self._to_do: dict[SafeRobot, Robot.Action | None] = {}
-
     @typing.override
     def new_robot(self, robot: SafeRobot):
         self._input_destinations[robot] = self._next_input(robot)
         self._given_actions[robot] = []
-        self._to_do[robot] = None
         self._start_time[robot] = self._model.now
 
     def _next_input(self, robot: SafeRobot | None):
         self._last += 1
         return self._model.map.input_ids[self._last % len(self._model.map.input_ids)]
 
-    def _go(self, robot: SafeRobot, pheromones: _Pheromones):
+    def _random(self) -> float:
+        if self._random_block <= 0:
+            return random.random()
+        if not self._randoms:
+            self._randoms = [random.random() for _ in range(self._random_block)]
+            self._randoms.reverse()
+        return self._randoms.pop()
+
+    def _choose(self, pheromones: _Pheromones, index: int, state: int):
+        """as `random.choices` with weights `pheromone**p / time**p`"""
+        times, acts = self._actions[state]
+        cumulative = pheromones.cumulative(index, times, self._p)
+        res = bisect.bisect(cumulative, self._random() * cumulative[-1], 0, len(cumulative) - 1)
+        return res, acts[res]
+
+    def _go(self, robot: SafeRobot, pheromones: _Pheromones, destination: int):
         if robot.timeout:
             self._given_actions[robot].pop()
-        if (act := self._to_do[robot]) is not None:
-            self._to_do[robot] = None
-            return act
-        next_ = pheromones.get()
+        cell = self._model.map.cell_id(robot.position)
+        index = pheromones.index(destination, cell, robot.direction)
+        next_ = self._choose(pheromones, index, cell*4 + robot.direction.value)
         if robot not in self._given_actions:
             self._given_actions[robot] = []
-        self._given_actions[robot].append((pheromones, next_[0]))
+        self._given_actions[robot].append((pheromones, index + next_[0]))
         if next_[1] in (Robot.Action.turn_to_up, Robot.Action.turn_to_left,
                         Robot.Action.turn_to_down, Robot.Action.turn_to_right):
-            self._to_do[robot] = Robot.Action.move
+            return Robot.MacroAction(Direction(next_[1].value - 10))
         return next_[1]
 
     @typing.override
     def _go_with_mail(self, robot: SafeRobot, destination: int):
-        pheromones = self._to_outputs[destination, robot.position, robot.direction]
-        return self._go(robot, pheromones)
+        return self._go(robot, self._to_outputs, destination)
 
     @typing.override
     def _go_without_mail(self, robot: SafeRobot, destination: int):
-        pheromones = self._to_inputs[destination, robot.position, robot.direction]
-        return self._go(robot, pheromones)
+        return self._go(robot, self._to_inputs, destination)
 
     @typing.override
     def _mail_put(self, robot: SafeRobot):
-        for pheromone, i in self._given_actions[robot]:
-            pheromone.to_update[i] += self._Q/(self._model.now - self._start_time[robot])
+        for pheromones, i in self._given_actions[robot]:
+            pheromones.to_update[i] += self._Q/(self._model.now - self._start_time[robot])
         self._given_actions[robot].clear()
         self._start_time[robot] = self._model.now
         self._input_destinations[robot] = self._next_input(robot)
 
     @typing.override
     def _mail_taken(self, robot: SafeRobot):
-        for pheromone, i in self._given_actions[robot]:
-            pheromone.to_update[i] += self._Q/(self._model.now - self._start_time[robot])
+        for pheromones, i in self._given_actions[robot]:
+            pheromones.to_update[i] += self._Q/(self._model.now - self._start_time[robot])
         self._given_actions[robot].clear()
         self._start_time[robot] = self._model.now
 
     def update(self):
-        for to in (self._to_inputs, self._to_outputs):
-            for ph in to.values():
-                ph.update()
+        self._to_inputs.update()
+        self._to_outputs.update()
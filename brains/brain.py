@@ -18,7 +18,7 @@ class Brain(abc.ABC, typing.Generic[MapT, RobotT]):
         self._model = model
 
     @abc.abstractmethod
-    def get_next_action(self, robot: RobotT) -> Robot.Action:
+    def get_next_action(self, robot: RobotT) -> Robot.Action | Robot.MacroAction:
         """Called by robot"""
     
     def collision_callback(self, robot: RobotT) -> None:
@@ -38,7 +38,7 @@ class OnlineBrain(Brain[MapT, SafeRobot]):
         self._input_destinations: dict[SafeRobot, int] = {}
 
     @typing.override
-    def get_next_action(self, robot: SafeRobot) -> Robot.Action:
+    def get_next_action(self, robot: SafeRobot) -> Robot.Action | Robot.MacroAction:
         if robot.mail is not None:
             if robot.position == self._model.map.outputs[robot.mail.destination]:
                 self._mail_put(robot)
@@ -51,11 +51,11 @@ class OnlineBrain(Brain[MapT, SafeRobot]):
             return self._go_without_mail(robot, self._input_destinations[robot])
 
     @abc.abstractmethod
-    def _go_with_mail(self, robot: SafeRobot, destination: int) -> Robot.Action:
+    def _go_with_mail(self, robot: SafeRobot, destination: int) -> Robot.Action | Robot.MacroAction:
         """Called if robot has mail"""
 
     @abc.abstractmethod
-    def _go_without_mail(self, robot: SafeRobot, destination: int) -> Robot.Action:
+    def _go_without_mail(self, robot: SafeRobot, destination: int) -> Robot.Action | Robot.MacroAction:
         """Called if robot does not have mail"""
 
     def _mail_taken(self, robot: SafeRobot):
@@ -0,0 +1,198 @@
+import collections
+import dataclasses
+import time
+import typing
+
+from brains.path_brain import PathBrain, Reservation, TimedVertex, State, INF
+from brains.algorithms import PathSpan
+from robot import Robot
+from structures import Map, RobotType
+from modelling import Model
+from cell import Cell
+from exceptions import UnreachablePath
+
+Path = list[PathSpan[TimedVertex[State]]]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Conflict:
+    """Reservations of two robots for the same cell at the same time"""
+    first: Robot[Cell]
+    first_reservation: Reservation
+    second: Robot[Cell]
+    second_reservation: Reservation
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CBSNode:
+    cost: float
+    constraints: dict[Robot[Cell], tuple[Reservation, ...]]
+    paths: dict[Robot[Cell], Path]
+    conflicts: list[Conflict]
+
+
+class CBSBrain(PathBrain):
+    """
+    Robots asking for path at the same time are planned together by conflict-based search.
+    Path of each robot is found by A* of `PathBrain` with constraints,
+    conflict of two robots is resolved by forbidding one of them
+    to be in the cell while the other one is there.
+    As in ECBS, from nodes with cost at most `suboptimality` times the minimal one
+    the node with the fewest conflicts is expanded.
+    If `max_nodes` nodes are expanded or search takes more than `max_time` seconds,
+    robots are planned one by one as in `PathBrain`.
+    Results depend on `max_time` only if it is set, as it is measured in wall-clock time.
+    Only personal rests are supported.
+    """
+    def __init__(self,
+                 model: Model[Map[Cell], typing.Self, Robot[Cell]],
+                 robot_type: RobotType,
+                 suboptimality: float = 1.5,
+                 max_nodes: int = 64,
+                 max_time: float = INF,
+                 window: float = INF,
+                 expire_period: float = 0) -> None:
+        super().__init__(model, robot_type, window=window, expire_period=expire_period)
+        self.suboptimality = suboptimality
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.solved_batches = 0
+        self.fallback_batches = 0
+        self._requests: list[Robot[Cell]] = []
+
+    @typing.override
+    def _generate_path(self, robot: Robot[Cell]) -> bool:
+        # robot holds its cell until it is planned, others must not use it
+        start = self._current[robot]
+        table = self._reserves[start.cell]
+        table.remove(start)
+        next_ = table.next(start)
+        until = INF if next_ is None else next_.reserve_from
+        self._current[robot] = table.add(
+            Reservation(start.cell, start.reserve_from, start.be_from, until, until), next_)
+        self._requests.append(robot)
+        if len(self._requests) == 1:
+            self._model.process(self._plan_requests())
+        return False
+
+    @typing.override
+    def _wait_for_path(self, robot: Robot[Cell]) -> Robot.Action:
+        return Robot.Action.idle
+
+    def _plan_requests(self):
+        yield self._model.timeout(0) # to get all requests of this moment
+        robots, self._requests = self._requests, []
+        starts = {robot: self._current[robot] for robot in robots}
+        for reservation in starts.values():
+            self._remove(reservation)
+        solution = self._conflict_based_search(starts)
+        if solution is None:
+            self.fallback_batches += 1
+            for reservation in starts.values():
+                table = self._reserves[reservation.cell]
+                table.add(reservation, table.next(reservation))
+            planned = {robot: PathBrain._generate_path(self, robot) for robot in robots}
+        else:
+            self.solved_batches += 1
+            for robot, path in solution.items():
+                self._commit(robot, starts[robot], path)
+            planned = {robot: len(path) != 0 for robot, path in solution.items()}
+        for robot in robots:
+            if planned[robot]:
+                robot.abort()
+            else:
+                PathBrain._wait_for_path(self, robot)
+
+    def _commit(self, robot: Robot[Cell], start_reserve: Reservation, path: Path):
+        self._robots_paths[robot].extend(path)
+        self._robots_reserves[robot].extend(
+            self._reserves[reservation.cell].insert(reservation)
+            for reservation, _ in self._path_reservations(start_reserve, None, path))
+        self._current[robot] = self._robots_reserves[robot].popleft()
+
+    def _goals(self, robot: Robot[Cell]) -> tuple[float, tuple[int, ...]]:
+        """time to wait in destination and cells to go through"""
+        map_ = self._model.map
+        if robot.mail is None:
+            return self.robot_type.time_to_take, (
+                map_.cell_id(map_.inputs[self._destinations[robot]]),
+                map_.cell_id(self.robots_rests[robot]))
+        return self.robot_type.time_to_put, (
+            map_.cell_id(map_.outputs[robot.mail.destination]),
+            map_.cell_id(self.robots_rests[robot]))
+
+    def _find_constrained_path(self, robot: Robot[Cell], start_reserve: Reservation,
+                               constraints: tuple[Reservation, ...]) -> Path | None:
+        """path with `constraints` temporarily added to reservations"""
+        by_cell = collections.defaultdict[int, list[Reservation]](list)
+        for constraint in constraints:
+            by_cell[constraint.cell].append(constraint)
+        saved = {cell: self._reserves[cell] for cell in by_cell}
+        for cell, cell_constraints in by_cell.items():
+            self._reserves[cell] = saved[cell].merged(cell_constraints)
+        try:
+            time_between, vs = self._goals(robot)
+            start = (self._model.map.cell_id(robot.position), robot.direction)
+            timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+            return self._find_path_for_positions(timed_start, self._model.now, time_between, *vs)
+        except UnreachablePath:
+            return None
+        finally:
+            for cell, table in saved.items():
+                self._reserves[cell] = table
+
+    def _conflicts(self, starts: dict[Robot[Cell], Reservation],
+                   paths: dict[Robot[Cell], Path]) -> list[Conflict]:
+        """conflicts between paths, the earliest first"""
+        by_cell = collections.defaultdict[int, list[tuple[Reservation, Robot[Cell]]]](list)
+        for robot, path in paths.items():
+            for reservation, _ in self._path_reservations(starts[robot], None, path):
+                by_cell[reservation.cell].append((reservation, robot))
+        conflicts: list[Conflict] = []
+        for reservations in by_cell.values():
+            reservations.sort(key=lambda item: item[0].reserve_from)
+            for i, (first, first_robot) in enumerate(reservations):
+                for second, second_robot in reservations[i+1:]:
+                    if second.reserve_from >= first.reserve_until:
+                        break
+                    if second_robot is not first_robot:
+                        conflicts.append(Conflict(first_robot, first, second_robot, second))
+        conflicts.sort(key=lambda conflict: conflict.second_reservation.reserve_from)
+        return conflicts
+
+    def _node(self, starts: dict[Robot[Cell], Reservation],
+              constraints: dict[Robot[Cell], tuple[Reservation, ...]],
+              paths: dict[Robot[Cell], Path]) -> CBSNode:
+        cost = sum(path[-1].end if path else self._model.now for path in paths.values())
+        return CBSNode(cost, constraints, paths, self._conflicts(starts, paths))
+
+    def _conflict_based_search(self, starts: dict[Robot[Cell], Reservation]
+                               ) -> dict[Robot[Cell], Path] | None:
+        """paths without conflicts or None if budget is exhausted"""
+        deadline = time.perf_counter() + self.max_time
+        paths: dict[Robot[Cell], Path] = {}
+        for robot, start_reserve in starts.items():
+            if (path := self._find_constrained_path(robot, start_reserve, ())) is None:
+                return None
+            paths[robot] = path
+        open_ = [self._node(starts, {}, paths)]
+        for _ in range(self.max_nodes):
+            if not open_ or time.perf_counter() > deadline:
+                return None
+            bound = min(node.cost for node in open_) * self.suboptimality
+            node = min((node for node in open_ if node.cost <= bound),
+                       key=lambda node: (len(node.conflicts), node.cost))
+            open_.remove(node)
+            if not node.conflicts:
+                return node.paths
+            conflict = node.conflicts[0]
+            for robot, other in ((conflict.first, conflict.second_reservation),
+                                 (conflict.second, conflict.first_reservation)):
+                constraints = node.constraints | {robot: node.constraints.get(robot, ()) + (
+                    Reservation(other.cell, other.reserve_from, other.reserve_from,
+                                other.reserve_until, other.reserve_until),)}
+                if (path := self._find_constrained_path(
+                        robot, starts[robot], constraints[robot])) is None:
+                    continue
+                open_.append(self._node(starts, constraints, node.paths | {robot: path}))
+        return None
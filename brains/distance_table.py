@@ -0,0 +1,87 @@
+import array
+import collections
+import heapq
+import typing
+
+from structures import Direction
+from precompute import PrecomputeCache, map_key
+
+if typing.TYPE_CHECKING:
+    from structures import Map, RobotType
+    from cell import Cell
+
+INF = float('inf')
+
+
+class DistanceTable:
+    """
+    Shortest time to reach goal cell from each state `(cell, direction)`
+    for robot with `robot_type` on `map_`, accounts for walls, `Map.successors`
+    (so one way edges) and turns.
+    Table for goal is computed by reverse Dijkstra at first request,
+    at most `max_goals` tables are kept, least recently used are dropped.
+    With `cache` tables are stored there and are loaded instead of computing.
+    """
+    def __init__(self, map_: "Map[Cell]", robot_type: "RobotType", max_goals: int = 256,
+                 cache: PrecomputeCache | None = None):
+        self._size = map_.size
+        self._cache = cache
+        self._key = map_key(map_, robot_type) if cache is not None else ""
+        self._move = robot_type.time_to_move
+        self._turn = robot_type.time_to_turn
+        self._max_goals = max_goals
+        self._tables: collections.OrderedDict[int, typing.Sequence[float]] = collections.OrderedDict()
+        # for each direction value and cell, cells from which robot gets to it
+        self._predecessors: tuple[list[list[int]], ...] = tuple(
+            [[] for _ in range(self._size)] for _ in Direction)
+        for direction, successors in enumerate(map_.successors):
+            for cell, successor in enumerate(successors):
+                if successor != -1:
+                    self._predecessors[direction][successor].append(cell)
+
+    def __call__(self, goal: int) -> typing.Sequence[float]:
+        """table for `goal` indexed by `cell*4 + direction.value`"""
+        if (table := self._tables.get(goal)) is not None:
+            self._tables.move_to_end(goal)
+            return table
+        if self._cache is None:
+            table = self._compute(goal)
+        else:
+            table = self._cache.get(f"distances-{self._key}-{goal}", 'd', lambda: self._compute(goal))
+        self._tables[goal] = table
+        if len(self._tables) > self._max_goals:
+            self._tables.popitem(last=False)
+        return table
+
+    def distance(self, cell: int, direction: Direction, goal: int) -> float:
+        return self(goal)[cell*4 + direction.value]
+
+    def min_distance(self, cell: int, goal: int) -> float:
+        """distance from `cell` in best direction"""
+        table = self(goal)
+        return min(table[cell*4:cell*4 + 4])
+
+    def _compute(self, goal: int) -> "array.array[float]":
+        table = array.array('d', [INF]) * (self._size * 4)
+        queue: list[tuple[float, int]] = []
+        for direction in range(4):
+            table[goal*4 + direction] = 0
+            queue.append((0, goal*4 + direction))
+        while queue:
+            time, state = heapq.heappop(queue)
+            if time > table[state]:
+                continue
+            cell, direction = divmod(state, 4)
+            for previous in self._predecessors[direction][cell]:
+                if (new_time := time + self._move) < table[previous := previous*4 + direction]:
+                    table[previous] = new_time
+                    heapq.heappush(queue, (new_time, previous))
+            for previous_direction in range(4):
+                if previous_direction == direction:
+                    continue
+                turns = 2 if (previous_direction - direction) % 4 == 2 else 1
+                new_time = time + turns*self._turn
+                if new_time < table[previous := cell*4 + previous_direction]:
+                    table[previous] = new_time
+                    heapq.heappush(queue, (new_time, previous))
+        return table
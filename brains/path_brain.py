@@ -1,3 +1,4 @@
+import bisect
 import collections
 import dataclasses
 import itertools
@@ -6,27 +7,30 @@ import typing
 from brains.brain import Brain
 from robot import Robot
 from structures import Map, Position, Direction, RobotType
-from brains.algorithms import LinkedList, TrueItem, Item, PathSpan, a_star, dijkstra, restore_path
+from brains.algorithms import PathSpan, PriorityQueue, MinHeap, a_star, dijkstra, restore_path
+from brains.distance_table import DistanceTable
+from precompute import PrecomputeCache
 from modelling import Model
 from cell import Cell
-from maps import OneWayMap
+from exceptions import UnreachablePath
 
 VertexT = typing.TypeVar("VertexT")
-State = tuple[Position, Direction]
+State = tuple[int, Direction] # cell id and direction
 INF = float('inf')
 
 @dataclasses.dataclass(frozen=True, slots=True)
 class TimedVertex(typing.Generic[VertexT]):
     vertex: VertexT
-    interval: Item["Reservation"]
+    interval: "Reservation | None" # reservation after free interval, None for the last one
 
     @typing.override
     def __repr__(self):
         return str(self.vertex)
 
 
-@dataclasses.dataclass(frozen=True, slots=True)
+@dataclasses.dataclass(frozen=True, slots=True, eq=False)
 class Reservation:
+    cell: int
     reserve_from: float
     be_from: float
     be_until: float
@@ -36,122 +40,421 @@ class Reservation:
         return f"({self.reserve_from}-{self.reserve_until})"
 
 
+class ReservationTable:
+    """
+    Reservations of one cell sorted by time.
+    Free interval between reservations is identified by reservation after it.
+    """
+    def __init__(self) -> None:
+        self._froms: list[float] = []
+        self._reservations: list[Reservation] = []
+
+    def __len__(self):
+        return len(self._reservations)
+
+    def __iter__(self) -> typing.Iterator[Reservation]:
+        return iter(self._reservations)
+
+    @typing.override
+    def __repr__(self):
+        return repr(self._reservations)
+
+    def _index(self, reservation: Reservation) -> int:
+        """index of `reservation`, -1 if it is not in the table"""
+        i = bisect.bisect_left(self._froms, reservation.reserve_from)
+        while i < len(self._froms) and self._froms[i] == reservation.reserve_from:
+            if self._reservations[i] is reservation:
+                return i
+            i += 1
+        return -1
+
+    def add(self, reservation: Reservation, before: Reservation | None = None) -> Reservation:
+        """inserts `reservation` to free interval before `before`, to the end if it is None"""
+        i = len(self._reservations) if before is None else self._index(before)
+        self._froms.insert(i, reservation.reserve_from)
+        self._reservations.insert(i, reservation)
+        return reservation
+
+    def insert(self, reservation: Reservation) -> Reservation:
+        """inserts `reservation` by its time"""
+        i = bisect.bisect_right(self._froms, reservation.reserve_from)
+        self._froms.insert(i, reservation.reserve_from)
+        self._reservations.insert(i, reservation)
+        return reservation
+
+    def merged(self, reservations: typing.Iterable[Reservation]) -> "ReservationTable":
+        """new table with added `reservations`, overlapping reservations are joined"""
+        result = ReservationTable()
+        for reservation in sorted(itertools.chain(self, reservations), key=lambda r: r.reserve_from):
+            if result._reservations and reservation.reserve_from < (last := result._reservations[-1]).reserve_until:
+                if reservation.reserve_until > last.reserve_until:
+                    result._reservations[-1] = Reservation(
+                        last.cell, last.reserve_from, last.be_from,
+                        reservation.be_until, reservation.reserve_until)
+            else:
+                result.add(reservation)
+        return result
+
+    def remove(self, reservation: Reservation):
+        """removes `reservation` if it is in the table"""
+        if (i := self._index(reservation)) != -1:
+            del self._froms[i]
+            del self._reservations[i]
+
+    def next(self, reservation: Reservation) -> Reservation | None:
+        """reservation after `reservation` or after its place if it was removed"""
+        if (i := self._index(reservation)) == -1:
+            i = bisect.bisect_right(self._froms, reservation.reserve_from)
+        else:
+            i += 1
+        return self._reservations[i] if i < len(self._reservations) else None
+
+    def is_first(self, reservation: Reservation) -> bool:
+        return len(self._reservations) != 0 and self._reservations[0] is reservation
+
+    def gaps(self, after: float = -INF
+             ) -> typing.Iterator[tuple[Reservation | None, Reservation | None]]:
+        """
+        yields reservations before and after each free interval,
+        starting from the first interval which does not end before `after`.
+        """
+        i = bisect.bisect_left(self._froms, after)
+        previous = self._reservations[i-1] if i != 0 else None
+        for j in range(i, len(self._reservations)):
+            yield previous, (previous := self._reservations[j])
+        yield previous, None
+
+    def expire(self, time: float) -> int:
+        """removes reservations ending not after `time`, returns their count"""
+        count = 0
+        while (count < len(self._reservations)
+               and self._reservations[count].reserve_until <= time):
+            count += 1
+        del self._froms[:count]
+        del self._reservations[:count]
+        return count
+
+
 class PathBrain(Brain[Map[Cell], Robot[Cell]]):
     """
     For each robot sequentially finds shortest path in `Position x Direction x Times` space
     from current position to destination and then to resting position.
-    `brain.robots_rests` must be set for each robot.
+    Robot rests at `brain.robots_rests`, its starting position if it is not set before adding the robot.
+    Internally positions are cell ids of the map.
+    A* heuristic is true distance from `DistanceTable`,
+    tables for at most `max_distance_goals` cells are kept (and stored in `precompute_cache` if it is given).
+    Every `expire_period` (if it is positive) reservations ended in the past are removed,
+    `reservations_history` keeps time and number of reservations after each removal.
+    With finite `window` default `path_adder` searches path only until the first state
+    after `now + window` which robot can hold forever (not at station or next to it),
+    and plans again when robot gets to it.
+    If such path keeps robot in its cell, robot goes to its rest to not block others,
+    if it can not leave its cell, it holds the cell and tries again later.
+    Without window routes found by A* are kept for at most `max_templates` pairs of
+    start state and goals, next path for them is first tried by the same route
+    if it delays robot at most by `template_slack` (`template_hits` and `template_misses` count it).
+    With `rebuild_path` waiting robot first reschedules the rest of its path by the same states,
+    and searches new path only if it is blocked (`repaired_paths` and `rebuilt_paths` count it).
+    With `macro_actions` turn and moves along straight line without waiting
+    are given as one `Robot.MacroAction`, reservations of passed cells are removed
+    when robot asks for the next action.
     """
     def __init__(self, 
                  model: Model[Map[Cell], typing.Self, Robot[Cell]],
                  robot_type: RobotType,
                  rebuild_path: bool = False,
-                 personal_rest: bool = True) -> None:
+                 personal_rest: bool = True,
+                 max_distance_goals: int = 256,
+                 expire_period: float = 0,
+                 window: float = INF,
+                 max_templates: int = 256,
+                 template_slack: float = 0,
+                 precompute_cache: PrecomputeCache | None = None,
+                 macro_actions: bool = False) -> None:
         super().__init__(model)
+        if window <= 0:
+            raise ValueError("window must be positive")
         self.robot_type = robot_type
-        self._reserves: dict[Position, LinkedList[Reservation]] = {
-            v: LinkedList() for v in model.map}
+        self._distances = DistanceTable(model.map, robot_type, max_distance_goals, precompute_cache)
+        self._reserves: list[ReservationTable] = [
+            ReservationTable() for _ in range(model.map.size)]
         self._robots_paths: dict[
             Robot[Cell], 
             collections.deque[PathSpan[TimedVertex[State]]]] = {}
         self._robots_reserves: dict[
             Robot[Cell], 
-            collections.deque[TrueItem[Reservation]]] = {}
+            collections.deque[Reservation]] = {}
         self._destinations: dict[Robot[Cell], int] = {}
         self._last = -1
-        self._current: dict[Robot[Cell], TrueItem[Reservation]] = {}
-        self._prev: dict[Robot[Cell], TrueItem[Reservation]] = {}
+        self._current: dict[Robot[Cell], Reservation] = {}
+        self._prev: dict[Robot[Cell], Reservation] = {}
         self._generate_to_input: dict[Robot[Cell], bool] = {}
         self._generate_to_output: dict[Robot[Cell], bool] = {}
         self._count_ends: list[int] = []
         self._avoid_puts: float = 0 # NOT WORKING
         self.path_adder: typing.Callable[
-            [Robot[Cell],float,float,Position,Position],
-            tuple[list[PathSpan[TimedVertex[State]]], list[TrueItem[Reservation]]]] = \
+            [Robot[Cell],float,float,int,int],
+            tuple[list[PathSpan[TimedVertex[State]]], list[Reservation]]] = \
             self._add_path_for_position
         self._rebuild_path: bool = rebuild_path
+        self.priority_queue: type[PriorityQueue[typing.Any, float]] = MinHeap
         self.robots_rests: dict[Robot[Cell], Position] = {}
         self.rests: list[Position] = []
         self.personal_rest = personal_rest
+        self.window = window
+        # robots waiting near stations block them, windowed paths do not end there
+        self._station_area = self._find_station_area(model.map)
+        self.expired_reservations = 0
+        self.reservations_history: list[tuple[float, int]] = []
+        self.max_templates = max_templates
+        self.template_slack = template_slack
+        self._templates: collections.OrderedDict[
+            tuple[State, tuple[int, ...], float],
+            tuple[tuple[State, float], ...]] = collections.OrderedDict()
+        self.template_hits = 0
+        self.template_misses = 0
+        self.repaired_paths = 0
+        self.rebuilt_paths = 0
+        self.macro_actions = macro_actions
+        if expire_period > 0:
+            model.process(self._expire_reservations(expire_period))
+
+    @staticmethod
+    def _find_station_area(map_: Map[Cell]) -> bytearray:
+        """1 for inputs, outputs and cells next to them"""
+        area = bytearray(map_.size)
+        for cell_id in range(map_.size):
+            cell = map_.cell(cell_id)
+            if cell.input_id is not None or cell.output_id is not None:
+                area[cell_id] = 1
+                for direction in Direction:
+                    if (next_ := map_.successor(cell_id, direction)) != -1:
+                        area[next_] = 1
+        return area
+
+    @property
+    def reservations_count(self):
+        return sum(len(table) for table in self._reserves)
+
+    def _expire_reservations(self, period: float):
+        while True:
+            yield self._model.timeout(period)
+            for table in self._reserves:
+                self.expired_reservations += table.expire(self._model.now)
+            self.reservations_history.append((self._model.now, self.reservations_count))
 
     @typing.override
     def new_robot(self, robot: Robot[Cell]):
+        self.robots_rests.setdefault(robot, robot.position)
         self._robots_paths[robot] = collections.deque()
         self._robots_reserves[robot] = collections.deque()
-        self._current[robot] = self._reserves[robot.position].add_before(
-            Reservation(self._model.now, self._model.now, INF, INF))
+        cell = self._model.map.cell_id(robot.position)
+        self._current[robot] = self._reserves[cell].add(
+            Reservation(cell, self._model.now, self._model.now, INF, INF))
         self._generate_to_input[robot] = True
         self._generate_to_output[robot] = False
 
     @typing.override
-    def get_next_action(self, robot: Robot[Cell]) -> Robot.Action:
+    def get_next_action(self, robot: Robot[Cell]) -> Robot.Action | Robot.MacroAction:
         if self._generate_to_input[robot]:
             self._generate_to_input[robot] = False
             self._assign_input(robot)
             self._clear_path(robot)
-            self._generate_input_path(robot)
         if self._generate_to_output[robot]:
             self._generate_to_output[robot] = False
             self._clear_path(robot)
-            self._generate_output_path(robot)
+        if not self._robots_paths[robot]: # new destination or end of window
+            self._update_current(robot)
+            if not self._generate_path(robot):
+                return self._wait_for_path(robot)
         new_state = self._robots_paths[robot][0]
+        position = self._model.map.cell_id(robot.position)
         if (robot.mail is not None
                 and robot.position == self._model.map.outputs[robot.mail.destination]
                 and new_state.start - self._model.now >= self.robot_type.time_to_put):
             self._generate_to_input[robot] = True
-            self._current[robot].remove()
-            self._current[robot] = self._robots_reserves[robot].popleft()
+            self._update_current(robot)
             return Robot.Action.put
         if (robot.mail is None
                 and robot.position == self._model.map.inputs[self._destinations[robot]]
                 and new_state.start - self._model.now >= self.robot_type.time_to_take):
             self._generate_to_output[robot] = True
-            self._current[robot].remove()
-            self._current[robot] = self._robots_reserves[robot].popleft()
+            self._update_current(robot)
             return Robot.Action.take
-        if self._current[robot].val.reserve_until <= self._model.now:
-            self._current[robot].remove()
-            self._current[robot] = self._robots_reserves[robot].popleft()
+        self._update_current(robot)
         if (new_state.start != self._model.now and
                 self._rebuild_path and 
-                self._robots_reserves[robot][0].prev == self._reserves[new_state.vertex_to.vertex[0]]):
-            self._clear_path(robot)
-            if robot.mail is None:
-                self._generate_input_path(robot)
+                self._reserves[new_state.vertex_to.vertex[0]].is_first(self._robots_reserves[robot][0])):
+            if self._repair_path(robot):
+                self.repaired_paths += 1
             else:
-                self._generate_output_path(robot)
+                self.rebuilt_paths += 1
+                self._clear_path(robot)
+                if robot.mail is None:
+                    self._generate_input_path(robot)
+                else:
+                    self._generate_output_path(robot)
             new_state = self._robots_paths[robot][0]
         if new_state.start != self._model.now:
             self._model.process(self._abort(new_state.start - self._model.now, robot))
             return Robot.Action.idle
         self._robots_paths[robot].popleft()
-        if new_state.vertex_to.vertex[0] == robot.position and new_state.vertex_to.vertex[1] != robot.direction:
+        if new_state.vertex_to.vertex[0] == position and new_state.vertex_to.vertex[1] != robot.direction:
+            if self.macro_actions and (moves := self._straight_moves(robot, new_state)):
+                return Robot.MacroAction(new_state.vertex_to.vertex[1], moves)
             return Robot.Action.turn_to(new_state.vertex_to.vertex[1])
-        if new_state.vertex_to.vertex[1] == robot.direction and new_state.vertex_to.vertex[0] != robot.position:
+        if new_state.vertex_to.vertex[1] == robot.direction and new_state.vertex_to.vertex[0] != position:
+            if self.macro_actions and (moves := self._straight_moves(robot, new_state)):
+                return Robot.MacroAction(None, moves + 1)
             return Robot.Action.move
         raise Exception("Wrong path.")
 
+    def _straight_moves(self, robot: Robot[Cell], span: PathSpan[TimedVertex[State]]) -> int:
+        """removes moves forward right after `span` from path, returns their count"""
+        path = self._robots_paths[robot]
+        direction = span.vertex_to.vertex[1]
+        end = span.end
+        count = 0
+        while (path and path[0].start == end
+               and path[0].vertex_to.vertex[1] == direction
+               and path[0].vertex_to.vertex[0] != path[0].vertex_from.vertex[0]):
+            end = path.popleft().end
+            count += 1
+        return count
+
+    def _update_current(self, robot: Robot[Cell]):
+        """moves to the next reservations of robot while current is ended"""
+        while (self._current[robot].reserve_until <= self._model.now
+               and self._robots_reserves[robot]):
+            self._remove(self._current[robot])
+            self._current[robot] = self._robots_reserves[robot].popleft()
+
+    def _repair_path(self, robot: Robot[Cell]) -> bool:
+        """
+        reschedules the rest of path by the same states as early as possible,
+        False (and nothing is changed) if it is blocked or gets to the end later
+        """
+        map_ = self._model.map
+        goal: int | None
+        if robot.mail is None:
+            goal, time_between = map_.cell_id(map_.inputs[self._destinations[robot]]), self.robot_type.time_to_take
+        else:
+            goal, time_between = map_.cell_id(map_.outputs[robot.mail.destination]), self.robot_type.time_to_put
+        # robot stays in goal at the first wait for `time_between` (as in `get_next_action`)
+        route: list[tuple[State, float]] = []
+        cell, time = map_.cell_id(robot.position), self._model.now
+        for span in self._robots_paths[robot]:
+            if goal is not None and cell == goal and span.start - time >= time_between:
+                route.append((span.vertex_to.vertex, time_between))
+                goal = None
+            else:
+                route.append((span.vertex_to.vertex, 0))
+            cell, time = span.vertex_to.vertex[0], span.end
+        start_reserve = self._current[robot]
+        old_end = self._robots_paths[robot][-1].end
+        for reservation in self._robots_reserves[robot]:
+            self._remove(reservation)
+        timed_start = TimedVertex(
+            (map_.cell_id(robot.position), robot.direction),
+            self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        path = self._schedule_route(route, timed_start, self._model.now, INF)
+        if path is None or path[-1].end > old_end:
+            table = self._reserves[start_reserve.cell]
+            table.add(start_reserve, table.next(start_reserve))
+            for reservation in self._robots_reserves[robot]:
+                table = self._reserves[reservation.cell]
+                table.add(reservation, table.next(reservation))
+            return False
+        self._robots_paths[robot] = collections.deque(path)
+        self._robots_reserves[robot] = collections.deque(
+            self._reserve_path(start_reserve, timed_start.interval, path))
+        self._current[robot] = self._robots_reserves[robot].popleft()
+        return True
+
+    def _remove(self, reservation: Reservation):
+        self._reserves[reservation.cell].remove(reservation)
+
     def _clear_path(self, robot: Robot[Cell]):
-        for path_span in self._robots_reserves[robot]:
-            path_span.remove()
+        for reservation in self._robots_reserves[robot]:
+            self._remove(reservation)
         self._robots_reserves[robot].clear()
         self._robots_paths[robot].clear()
 
+    def _generate_path(self, robot: Robot[Cell]) -> bool:
+        """
+        plans path to input or output depending on robot's mail.
+        Returns False if robot stays in its cell.
+        """
+        if self.window == INF:
+            self._generate_destination_path(robot)
+            return len(self._robots_paths[robot]) != 0
+        # waiting robot holds its cell forever and may block robots it waits for
+        return (self._try_path(robot, self._generate_destination_path)
+                or self._try_path(robot, self._generate_rest_path))
+
+    def _try_path(self, robot: Robot[Cell],
+                  generate: typing.Callable[[Robot[Cell]], None]) -> bool:
+        """
+        plans path by `generate`, if it is unreachable robot holds its cell.
+        Returns False if robot stays in its cell.
+        """
+        start_reserve = self._current[robot]
+        try:
+            generate(robot)
+        except UnreachablePath:
+            table = self._reserves[start_reserve.cell]
+            table.remove(start_reserve)
+            if table.next(start_reserve) is not None:
+                raise
+            self._current[robot] = table.add(Reservation(
+                start_reserve.cell, start_reserve.reserve_from, start_reserve.be_from, INF, INF))
+            return False
+        return len(self._robots_paths[robot]) != 0
+
+    def _generate_destination_path(self, robot: Robot[Cell]):
+        if robot.mail is None:
+            self._generate_input_path(robot)
+        else:
+            self._generate_output_path(robot)
+
+    def _generate_rest_path(self, robot: Robot[Cell]):
+        """path to rest of robot (the closest one if rests are not personal) with full horizon"""
+        start = (self._model.map.cell_id(robot.position), robot.direction)
+        start_reserve = self._current[robot]
+        timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        if self.personal_rest:
+            path = self._find_path_for_positions(
+                timed_start, self._model.now, 0,
+                self._model.map.cell_id(self.robots_rests[robot]), window=INF)
+        else:
+            path = self._find_path_for_rests(timed_start, self._model.now)
+        self._robots_paths[robot].extend(path)
+        self._robots_reserves[robot].extend(
+            self._reserve_path(start_reserve, timed_start.interval, path))
+        self._current[robot] = self._robots_reserves[robot].popleft()
+
+    def _wait_for_path(self, robot: Robot[Cell]) -> Robot.Action:
+        """robot waits for `time_to_move` and asks for path again"""
+        self._model.process(self._abort(self.robot_type.time_to_move, robot))
+        return Robot.Action.idle
+
     def _generate_input_path(self, robot: Robot[Cell]):
         if self.personal_rest:
             res = self.path_adder(
             robot,
             self._model.now,
             self.robot_type.time_to_take,
-            self._model.map.inputs[self._destinations[robot]],
-            self.robots_rests[robot]
+            self._model.map.cell_id(self._model.map.inputs[self._destinations[robot]]),
+            self._model.map.cell_id(self.robots_rests[robot])
         )
         else:
             res = self._add_path_for_closest_rest(
                 robot,
                 self._model.now,
                 self.robot_type.time_to_take,
-                self._model.map.inputs[self._destinations[robot]],
+                self._model.map.cell_id(self._model.map.inputs[self._destinations[robot]]),
             )
         self._robots_paths[robot].extend(res[0])
         self._robots_reserves[robot].extend(res[1])
@@ -166,14 +469,14 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
             res = self.path_adder(
                 robot, self._model.now,
                 self.robot_type.time_to_put,
-                self._model.map.outputs[robot.mail.destination], # type: ignore
-                self.robots_rests[robot])
+                self._model.map.cell_id(self._model.map.outputs[robot.mail.destination]), # type: ignore
+                self._model.map.cell_id(self.robots_rests[robot]))
         else:
             res = self._add_path_for_closest_rest(
                 robot,
                 self._model.now,
                 self.robot_type.time_to_put,
-                self._model.map.outputs[robot.mail.destination], # type: ignore
+                self._model.map.cell_id(self._model.map.outputs[robot.mail.destination]), # type: ignore
             )
         self._robots_paths[robot].extend(res[0])
         self._robots_reserves[robot].extend(res[1])
@@ -185,12 +488,8 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
 
     def _next_states(self, state: State
                    ) -> typing.Iterable[tuple[State, float]]:
-        if isinstance(self._model.map, OneWayMap):
-            if self._model.map.can_go(state[0], state[1]):
-                yield (state[0].get_next_on(state[1]), state[1]), self.robot_type.time_to_move
-        else:
-            if self._model.map.has(new_pos := state[0].get_next_on(state[1])):
-                yield (new_pos, state[1]), self.robot_type.time_to_move
+        if (new_cell := self._model.map.successor(state[0], state[1])) != -1:
+            yield (new_cell, state[1]), self.robot_type.time_to_move
         for new_direction in Direction:
             if new_direction != state[1]:
                 yield (state[0], new_direction),\
@@ -198,37 +497,38 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
 
     def _timed_edges(self, vertex: TimedVertex[State], time: float
                     ) -> typing.Iterable[PathSpan[TimedVertex[State]]]:
+        leave_until = INF if vertex.interval is None else vertex.interval.reserve_from
         for u, weight in self._next_states(vertex.vertex):
-            for new_interval in self._reserves[u[0]]: # before new_interval
-                new_state = TimedVertex(u, new_interval)
+            for previous, new_interval in self._reserves[u[0]].gaps(time + weight):
                 min_time = time + weight
-                if new_interval.prev.val is not None: # to not first interval
-                    min_time = max(min_time, new_interval.prev.val.reserve_until+weight)
-                if new_interval.val is not None: # to not last interval
-                    max_time = new_interval.val.reserve_from
+                if previous is not None: # to not first interval
+                    if (previous.reserve_until == INF # held forever
+                            or previous.reserve_until + weight > leave_until):
+                        break
+                    min_time = max(min_time, previous.reserve_until + weight)
+                if new_interval is not None: # to not last interval
+                    max_time = min(new_interval.reserve_from, leave_until)
                 else:
-                    max_time = INF
-                if vertex.interval.val is not None: # from not last interval
-                    max_time = min(max_time, vertex.interval.val.reserve_from)
+                    max_time = leave_until
                 if max_time < min_time:
                     continue
-                yield PathSpan(vertex, new_state, min_time - weight, min_time)
+                yield PathSpan(vertex, TimedVertex(u, new_interval), min_time - weight, min_time)
 
-    def _multi_distance(self, vs: tuple[Position, ...], time_between: float,
+    def _multi_distance(self, vs: tuple[int, ...], time_between: float,
                        cur: tuple[TimedVertex[State], int]):
         if (self._avoid_puts and 
-            ((cell := self._model.map[cur[0].vertex[0]]).input_id is not None
+            ((cell := self._model.map.cell(cur[0].vertex[0])).input_id is not None
               or cell.output_id is not None) 
             and cur[0].vertex != vs[0]):
             avoid = self._avoid_puts
         else:
             avoid = 0
-        ans = self._model.map.distance(cur[0].vertex[0], vs[cur[1]])
+        ans = self._distances.distance(cur[0].vertex[0], cur[0].vertex[1], vs[cur[1]])
         for i in range(cur[1], len(vs)-1):
-            ans += self._model.map.distance(vs[i], vs[i+1])
-        return ans*self.robot_type.time_to_move + (time_between+0.01)*(len(vs)-cur[1]-1) + avoid
+            ans += self._distances.min_distance(vs[i], vs[i+1])
+        return ans + (time_between+0.01)*(len(vs)-cur[1]-1) + avoid
 
-    def _timed_edges_for_multi(self, vs: tuple[Position, ...],
+    def _timed_edges_for_multi(self, vs: tuple[int, ...],
                               time_between: float,
                               v: tuple[TimedVertex[State], int],
                               time:float,
@@ -238,7 +538,7 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
             if v[0].vertex[0] == vs[v[1]]:
                 if v[1] == len(vs) - 1:
                     return
-                if self._reserves[v[0].vertex[0]] == v[0].interval:
+                if v[0].interval is None:
                     self._count_ends[v[1]] += 1
                 for i in self._timed_edges(v[0], time + time_between):
                     # if i.vertex.vertex[1] == v[0].vertex[1]: # optional, TODO
@@ -248,78 +548,85 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
 
     def _find_path_for_state(self, start: TimedVertex[State], time: float, end: State
                   ) -> dict[TimedVertex[State], list[PathSpan[TimedVertex[State]]]]:
-        data = dijkstra(self._timed_edges, start, time)
+        data = dijkstra(self._timed_edges, start, time, self.priority_queue)
         return {
             v_end: list(restore_path(start, v_end, data))
-            for interval in self._reserves[end[0]]
+            for _, interval in self._reserves[end[0]].gaps()
             if (v_end := TimedVertex(end, interval)) in data
         }
 
-    def _find_path_for_position(self, start: TimedVertex[State], time: float, end: Position
+    def _find_path_for_position(self, start: TimedVertex[State], time: float, end: int
                   ) -> dict[TimedVertex[State], list[PathSpan[TimedVertex[State]]]]:
-        data = dijkstra(self._timed_edges, start, time)
+        data = dijkstra(self._timed_edges, start, time, self.priority_queue)
         return {
             v_end: list(restore_path(start, v_end, data))
-            for interval in self._reserves[end]
+            for _, interval in self._reserves[end].gaps()
             for end_direction in Direction
             if (v_end := TimedVertex((end, end_direction), interval)) in data
         }
     
     def _find_path_for_rests(self, start: TimedVertex[State], time: float
                   ) -> list[PathSpan[TimedVertex[State]]]:
-        data = dijkstra(self._timed_edges, start, time)
+        data = dijkstra(self._timed_edges, start, time, self.priority_queue)
         min_time = INF
         min_end: TimedVertex[State] | None = None
-        for position in self.rests:
+        for position in map(self._model.map.cell_id, self.rests):
             for direction in Direction:
-                end = TimedVertex((position, direction), self._reserves[position])
+                end = TimedVertex((position, direction), None)
                 if end in data and data[end].end < min_time:
                     min_time = data[end].end
                     min_end = end
         if min_end is None:
-            raise Exception("Unreachable path.")
+            raise UnreachablePath()
         return list(restore_path(start, min_end, data))
 
-    def _reserve_path(self, start_reserve: "TrueItem[Reservation]",
-                     path: typing.Iterable[PathSpan[TimedVertex[State]]]
-                     ) -> list[TrueItem[Reservation]]:
-        start_reserve.remove()
-        prev_reserve_from: float = start_reserve.val.reserve_from
-        prev_be_from: float = start_reserve.val.be_from
-        prev_interval = start_reserve.next
-        result: list[TrueItem[Reservation]] = []
+    @staticmethod
+    def _path_reservations(start_reserve: Reservation, start_interval: Reservation | None,
+                           path: typing.Iterable[PathSpan[TimedVertex[State]]]
+                           ) -> typing.Iterator[tuple[Reservation, Reservation | None]]:
+        """reservations for robot going by `path` and free intervals (reservations after them) to put them"""
+        prev_reserve_from: float = start_reserve.reserve_from
+        prev_be_from: float = start_reserve.be_from
+        prev_cell = start_reserve.cell
+        prev_interval = start_interval
         for path_span in path:
-            result.append(prev_interval.add_before(
-                Reservation(prev_reserve_from, prev_be_from, path_span.start, path_span.end)))
+            yield (Reservation(prev_cell, prev_reserve_from, prev_be_from, path_span.start, path_span.end),
+                   prev_interval)
             prev_reserve_from = path_span.start
             prev_be_from = path_span.end
+            prev_cell = path_span.vertex_to.vertex[0]
             prev_interval = path_span.vertex_to.interval
-        result.append(prev_interval.add_before(
-            Reservation(prev_reserve_from, prev_be_from, INF, INF)))
-        return result
+        yield Reservation(prev_cell, prev_reserve_from, prev_be_from, INF, INF), prev_interval
+
+    def _reserve_path(self, start_reserve: Reservation, start_interval: Reservation | None,
+                     path: typing.Iterable[PathSpan[TimedVertex[State]]]
+                     ) -> list[Reservation]:
+        self._remove(start_reserve)
+        return [self._reserves[reservation.cell].add(reservation, before)
+                for reservation, before in self._path_reservations(start_reserve, start_interval, path)]
 
     def _add_path(self, robot: Robot[Cell], start_time: float, end: State
-                 ) -> tuple[list[PathSpan[TimedVertex[State]]], list[TrueItem[Reservation]]]:
-        start = (robot.position, robot.direction)
+                 ) -> tuple[list[PathSpan[TimedVertex[State]]], list[Reservation]]:
+        start = (self._model.map.cell_id(robot.position), robot.direction)
         start_reserve = self._current[robot] # self._reserves[start[0]].prev
-        if start_reserve.val.be_from > start_time:
+        if start_reserve.be_from > start_time:
             raise Exception(f"Wrong Path start: {robot} in {start} at {start_time} ")
-        start_reserve.remove()
-        timed_start = TimedVertex(start, start_reserve.next)
-        timed_end = TimedVertex(end, self._reserves[end[0]])
-        path = list(restore_path(timed_start, timed_end, dijkstra(self._timed_edges, timed_start, start_time)))
-        return path, self._reserve_path(start_reserve, path)
+        timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        timed_end = TimedVertex(end, None)
+        path = list(restore_path(timed_start, timed_end, dijkstra(self._timed_edges, timed_start, start_time, self.priority_queue)))
+        return path, self._reserve_path(start_reserve, timed_start.interval, path)
 
     def _add_path_for_state(self, robot: Robot[Cell], start_time: float, time_between: float,
                            *vs: State
-                           ) -> tuple[list[PathSpan[TimedVertex[State]]], list[TrueItem[Reservation]]]:
-        start = (robot.position, robot.direction)
+                           ) -> tuple[list[PathSpan[TimedVertex[State]]], list[Reservation]]:
+        start = (self._model.map.cell_id(robot.position), robot.direction)
         start_reserve = self._current[robot] # self._reserves[start[0]].prev
-        if start_reserve.val.be_from > start_time:
+        if start_reserve.be_from > start_time:
             raise Exception(f"Wrong Path start: {robot} in {start} at {start_time} ")
-        start_reserve.remove()
-        timed_start = TimedVertex(start, start_reserve.next)
-        paths = [{timed_start: ([PathSpan(timed_start, timed_start, start_reserve.val.reserve_from, start_time-time_between)], timed_start)}]
+        timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        paths = [{timed_start: ([PathSpan(timed_start, timed_start, start_reserve.reserve_from, start_time-time_between)], timed_start)}]
         for i in range(len(vs)):
             paths.append({})
             for vertex_from, (path, _) in paths[i].items():
@@ -327,27 +634,27 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
                 for vertex_to, new_path in res.items():
                     if vertex_to not in paths[i+1] or paths[i+1][vertex_to][0][-1].end > new_path[-1].end:
                         paths[i+1][vertex_to] = (new_path, vertex_from)
-        next_ = TimedVertex(vs[-1], self._reserves[vs[-1][0]])
+        next_ = TimedVertex(vs[-1], None)
         all_path: list[list[PathSpan[TimedVertex[State]]]] = []
         for i in range(len(vs), 0, -1):
             path = paths[i][next_]
             next_ = path[1]
             all_path.append(path[0])
         path = list(itertools.chain.from_iterable(reversed(all_path)))
-        reserve = self._reserve_path(start_reserve, path)
+        reserve = self._reserve_path(start_reserve, timed_start.interval, path)
         return path, reserve
     
     def _add_path_for_position_double_dijkstra(
             self, robot: Robot[Cell], start_time: float, time_between: float,
-            for_min_time: Position, end: Position
-            ) -> tuple[list[PathSpan[TimedVertex[State]]], list[TrueItem[Reservation]]]:
-        start = (robot.position, robot.direction)
+            for_min_time: int, end: int
+            ) -> tuple[list[PathSpan[TimedVertex[State]]], list[Reservation]]:
+        start = (self._model.map.cell_id(robot.position), robot.direction)
         start_reserve = self._current[robot]
-        if start_reserve.val.be_from > start_time:
+        if start_reserve.be_from > start_time:
             raise Exception(f"Wrong Path start: {robot} in {start} at {start_time} ")
-        start_reserve.remove()
-        timed_start = TimedVertex(start, start_reserve.next)
-        paths = [{timed_start: [PathSpan(timed_start, timed_start, start_reserve.val.reserve_from, start_time-time_between)]}]
+        timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        paths = [{timed_start: [PathSpan(timed_start, timed_start, start_reserve.reserve_from, start_time-time_between)]}]
         paths.append({})
         for vertex_from, path in paths[0].items():
             res = self._find_path_for_position(vertex_from, path[-1].end + time_between, for_min_time)
@@ -366,23 +673,23 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
                     min_path = new_path
                     min_from = vertex_from
         if min_time is None:
-            raise Exception("Unreachable path.")
+            raise UnreachablePath()
         all_path = [paths[1][min_from], min_path] # type: ignore
         path = list(itertools.chain.from_iterable(all_path))
-        reserve = self._reserve_path(start_reserve, path)
+        reserve = self._reserve_path(start_reserve, timed_start.interval, path)
         return path, reserve
 
     def _add_path_for_closest_rest(
             self, robot: Robot[Cell], start_time: float, time_between: float,
-            for_min_time: Position
-            ) -> tuple[list[PathSpan[TimedVertex[State]]], list[TrueItem[Reservation]]]:
-        start = (robot.position, robot.direction)
+            for_min_time: int
+            ) -> tuple[list[PathSpan[TimedVertex[State]]], list[Reservation]]:
+        start = (self._model.map.cell_id(robot.position), robot.direction)
         start_reserve = self._current[robot]
-        if start_reserve.val.be_from > start_time:
+        if start_reserve.be_from > start_time:
             raise Exception(f"Wrong Path start: {robot} in {start} at {start_time} ")
-        start_reserve.remove()
-        timed_start = TimedVertex(start, start_reserve.next)
-        paths = [{timed_start: [PathSpan(timed_start, timed_start, start_reserve.val.reserve_from, start_time-time_between)]}]
+        timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        paths = [{timed_start: [PathSpan(timed_start, timed_start, start_reserve.reserve_from, start_time-time_between)]}]
         paths.append({})
         for vertex_from, path in paths[0].items():
             res = self._find_path_for_position(vertex_from, path[-1].end + time_between, for_min_time)
@@ -396,47 +703,139 @@ class PathBrain(Brain[Map[Cell], Robot[Cell]]):
         for vertex_from, path in paths[1].items():
             try:
                 new_path = self._find_path_for_rests(vertex_from, path[-1].end + time_between)
-            except:
+            except UnreachablePath:
                 continue
             if min_time is None or path[-1].end < min_time:
                 min_time = path[-1].end
                 min_path = new_path
                 min_from = vertex_from
         if min_time is None:
-            raise Exception("Unreachable path.")
+            raise UnreachablePath()
         all_path = [paths[1][min_from], min_path] # type: ignore
         path = list(itertools.chain.from_iterable(all_path))
-        reserve = self._reserve_path(start_reserve, path)
+        reserve = self._reserve_path(start_reserve, timed_start.interval, path)
         return path, reserve
     
     def _add_path_for_position(
             self, robot: Robot[Cell], start_time: float, time_between: float,
-            *vs: Position
-            ) -> tuple[list[PathSpan[TimedVertex[State]]], list[TrueItem[Reservation]]]:
-        start = (robot.position, robot.direction)
+            *vs: int
+            ) -> tuple[list[PathSpan[TimedVertex[State]]], list[Reservation]]:
+        start = (self._model.map.cell_id(robot.position), robot.direction)
         start_reserve = self._current[robot] # self._reserves[start[0]].prev
-        if start_reserve.val.be_from > start_time:
+        if start_reserve.be_from > start_time:
             raise Exception(f"Wrong Path start: {robot} in {start} at {start_time} ")
-        start_reserve.remove()
-        timed_start = TimedVertex(start, start_reserve.next)
+        timed_start = TimedVertex(start, self._reserves[start_reserve.cell].next(start_reserve))
+        self._remove(start_reserve)
+        if self.window != INF or self.max_templates == 0:
+            path = self._find_path_for_positions(timed_start, start_time, time_between, *vs)
+        else:
+            key = (start, vs, time_between)
+            path = self._schedule_template(key, timed_start, start_time)
+            if path is None:
+                self.template_misses += 1
+                multi_path = self._find_multi_path(timed_start, start_time, time_between, *vs)
+                self._store_template(key, multi_path, time_between)
+                path = self._strip_legs(multi_path)
+            else:
+                self.template_hits += 1
+        reserve = self._reserve_path(start_reserve, timed_start.interval, path)
+        return path, reserve
+
+    def _schedule_template(self, key: tuple[State, tuple[int, ...], float],
+                           timed_start: TimedVertex[State], start_time: float
+                           ) -> list[PathSpan[TimedVertex[State]]] | None:
+        """path by cached route if robot is delayed on it at most by `template_slack`"""
+        if (template := self._templates.get(key)) is None:
+            return None
+        self._templates.move_to_end(key)
+        return self._schedule_route(template, timed_start, start_time, self.template_slack)
+
+    def _schedule_route(self, route: typing.Iterable[tuple[State, float]],
+                        timed_start: TimedVertex[State], start_time: float, slack: float
+                        ) -> list[PathSpan[TimedVertex[State]]] | None:
+        """
+        earliest path through states of `route` waiting given time before leaving previous one,
+        None if it is blocked or robot is delayed more than `slack`
+        """
+        vertex, time = timed_start, start_time
+        delay = 0.0
+        path: list[PathSpan[TimedVertex[State]]] = []
+        for state, wait in route:
+            for span in self._timed_edges(vertex, time + wait):
+                if span.vertex_to.vertex == state:
+                    break
+            else:
+                return None
+            if (delay := delay + span.start - time - wait) > slack:
+                return None
+            path.append(span)
+            vertex, time = span.vertex_to, span.end
+        if vertex.interval is not None: # can not stay at the end
+            return None
+        return path
+
+    def _store_template(self, key: tuple[State, tuple[int, ...], float],
+                        multi_path: list[PathSpan[tuple[TimedVertex[State], int]]],
+                        time_between: float):
+        """remembers states of path and waits in goals"""
+        self._templates[key] = tuple(
+            (span.vertex_to[0].vertex,
+             time_between if span.vertex_to[1] != span.vertex_from[1] else 0)
+            for span in multi_path)
+        self._templates.move_to_end(key)
+        if len(self._templates) > self.max_templates:
+            self._templates.popitem(last=False)
+
+    @staticmethod
+    def _strip_legs(multi_path: list[PathSpan[tuple[TimedVertex[State], int]]]
+                    ) -> list[PathSpan[TimedVertex[State]]]:
+        return [PathSpan(span.vertex_from[0], span.vertex_to[0], span.start, span.end)
+                for span in multi_path]
+
+    def _find_path_for_positions(self, timed_start: TimedVertex[State], start_time: float,
+                                 time_between: float, *vs: int, window: float | None = None
+                                 ) -> list[PathSpan[TimedVertex[State]]]:
+        """A* through all `vs` waiting `time_between` in each, only searches"""
+        return self._strip_legs(self._find_multi_path(
+            timed_start, start_time, time_between, *vs, window=window))
+
+    def _find_multi_path(self, timed_start: TimedVertex[State], start_time: float,
+                         time_between: float, *vs: int, window: float | None = None
+                         ) -> list[PathSpan[tuple[TimedVertex[State], int]]]:
+        """
+        path of A* states, each is timed vertex and index of the next goal,
+        `window` is `self.window` if it is None
+        """
         self._count_ends = [0]*len(vs)
+        deadline = start_time + (self.window if window is None else window)
+        # best state to wait in until deadline: time at deadline + heuristic, state
+        window_end: list[tuple[float, tuple[TimedVertex[State], int]]] = []
+        def end_check(v: tuple[TimedVertex[State], int], time: float):
+            if v[0].interval is None and v[0].vertex[0] == vs[-1] and v[1] == len(vs) - 1:
+                window_end.clear()
+                return True
+            if deadline == INF:
+                return False
+            cost = time + self._multi_distance(vs, time_between, v)
+            if v[0].interval is None and not self._station_area[v[0].vertex[0]]:
+                cost_with_wait = cost + max(deadline - time, 0)
+                if not window_end or cost_with_wait < window_end[0][0]:
+                    window_end[:] = [(cost_with_wait, v)]
+            return len(window_end) != 0 and cost >= window_end[0][0]
         data = a_star(lambda v, t: self._timed_edges_for_multi(vs, time_between, v, t),
                       lambda v: self._multi_distance(vs, time_between, v),
-                      lambda v: v[0].vertex[0] == vs[-1]
-                                and v[1] == len(vs) - 1
-                                and v[0].interval == self._reserves[vs[-1]],
-                      (timed_start, 0), start_time)
+                      end_check,
+                      (timed_start, 0), start_time, self.priority_queue)
         min_ = INF
         min_end: tuple[TimedVertex[State], int] | None = None
-        for direction in Direction:
-            end = (TimedVertex((vs[-1], direction), self._reserves[vs[-1]]), len(vs)-1)
-            if end in data and data[end].end < min_:
-                min_ = data[end].end
-                min_end = end
+        if window_end:
+            min_end = window_end[0][1]
+        else:
+            for direction in Direction:
+                end = (TimedVertex((vs[-1], direction), None), len(vs)-1)
+                if end in data and data[end].end < min_:
+                    min_ = data[end].end
+                    min_end = end
         if min_end is None:
-            raise Exception("Unreachable path")
-        path = list(
-            PathSpan(span.vertex_from[0], span.vertex_to[0], span.start, span.end)
-            for span in restore_path((timed_start, 0), min_end, data))
-        reserve = self._reserve_path(start_reserve, path)
-        return path, reserve
+            raise UnreachablePath()
+        return list(restore_path((timed_start, 0), min_end, data))
@@ -1,7 +1,7 @@
+import collections
 import typing
 import simpy
 import simpy.resources.store
-import simpy.resources.resource
 
 from exceptions import (
     MovedToWall,
@@ -87,9 +87,54 @@ class Cell:
         return f"Cell{self.position}"
 
 
-class SafeCell(Cell, simpy.Resource):
+class OccupancyGrid:
     """
-    Cell for `SafeRobot` so robot waits for cell to free
+    Occupancy of `SafeCell`s of one map by cell id:
+    flags of occupied cells and requests holding them,
+    queues of waiting requests exist only for cells robots wait for.
+    Requests are granted in order as by `simpy.Resource` with capacity 1.
+    """
+    def __init__(self, env: simpy.Environment, size: int):
+        self._env = env
+        self.occupied = bytearray(size)
+        self._holders: dict[int, simpy.Event] = {}
+        self._queues: dict[int, collections.deque[simpy.Event]] = {}
+
+    def request(self, cell: int) -> simpy.Event:
+        request = self._env.event()
+        self._queues.setdefault(cell, collections.deque()).append(request)
+        self._grant(cell)
+        return request
+
+    def release(self, cell: int, request: simpy.Event):
+        """frees cell held by `request` or cancels waiting `request`"""
+        if self._holders.get(cell) is request:
+            del self._holders[cell]
+            self.occupied[cell] = False
+            # as in `simpy.Resource` waiting request gets cell when release is processed
+            release = self._env.event()
+            release.callbacks.append(lambda _: self._grant(cell)) # pyright: ignore[reportUnknownMemberType]
+            release.succeed()
+        elif (queue := self._queues.get(cell)) is not None and request in queue:
+            queue.remove(request)
+            if not queue:
+                del self._queues[cell]
+
+    def _grant(self, cell: int):
+        if self.occupied[cell] or (queue := self._queues.get(cell)) is None:
+            return
+        request = queue.popleft()
+        if not queue:
+            del self._queues[cell]
+        self.occupied[cell] = True
+        self._holders[cell] = request
+        request.succeed()
+
+
+class SafeCell(Cell):
+    """
+    Cell for `SafeRobot` so robot waits for cell to free.
+    Occupancy is kept in `OccupancyGrid` of the map, cell is bound to it by `Map`.
     """
     @typing.overload
     def __init__(self, env: simpy.Environment,
@@ -108,17 +153,28 @@ class SafeCell(Cell, simpy.Resource):
                  input_id: int | None = None,
                  output_id: int | None = None,
                  free: bool = True):
-        simpy.Resource.__init__(self, env)
         Cell.__init__(self, env, get_mail_input, input_id, output_id, free) # type: ignore
+        self._grid: OccupancyGrid | None = None
+        self._cell_id = -1
+
+    @property
+    def grid(self) -> OccupancyGrid | None:
+        return self._grid
+
+    def bind(self, grid: OccupancyGrid, cell_id: int):
+        self._grid = grid
+        self._cell_id = cell_id
 
     @typing.override
     def reserve(self) -> simpy.Event:
         if not self._free:
             raise MovedToWall(self)
-        return simpy.Resource.request(self)
+        if self._grid is None:
+            raise UnknownRequest(f"{self} is not in a map.")
+        return self._grid.request(self._cell_id)
 
     @typing.override
     def unreserve(self, request: simpy.Event):
-        if isinstance(request, simpy.resources.resource.Request):
-            request.cancel()
-            self.release(request)
+        if self._grid is None:
+            raise UnknownRequest(f"{self} is not in a map.")
+        self._grid.release(self._cell_id, request)
@@ -0,0 +1,65 @@
+import random
+import time
+
+from cell import Cell
+from mail_factories import RandomAlwaysReadyMail
+from import_data import import_map, import_json
+from structures import Direction, Position, Map
+from robot import Robot, RobotType
+from brains.algorithms import MinHeap, LazyHeap, BucketQueue, PathSpan, dijkstra
+from brains.path_brain import PathBrain
+from modelling import Model
+
+QUEUES = (MinHeap, LazyHeap, BucketQueue)
+
+
+def grid_edges(size: int, weights: dict[tuple[int, int], int]):
+    def edges(vertex: tuple[int, int], time: float):
+        x, y = vertex
+        for new_vertex in ((x+1, y), (x-1, y), (x, y+1), (x, y-1)):
+            if 0 <= new_vertex[0] < size and 0 <= new_vertex[1] < size:
+                yield PathSpan(vertex, new_vertex, time, time + weights[new_vertex])
+    return edges
+
+
+def grid_benchmark(size: int = 150):
+    """dijkstra on grid with integer weights"""
+    rng = random.Random(0)
+    weights = {(x, y): rng.randint(1, 3) for x in range(size) for y in range(size)}
+    for queue in QUEUES:
+        start = time.perf_counter()
+        dijkstra(grid_edges(size, weights), (0, 0), 0, queue)
+        print(f"grid {size}x{size}, {queue.__name__}: {time.perf_counter() - start:.3f}s")
+
+
+def path_brain_benchmark(run_time: float = 1000):
+    """`PathBrain` on map1-simple, time is mostly spent in planning"""
+    starts = [
+        Position(2, 2),
+        Position(2, 4),
+        Position(2, 6),
+        Position(3, 3),
+        Position(3, 5),
+        Position(4, 2),
+        Position(4, 6),
+    ]
+    for queue in QUEUES:
+        random.seed(0)
+        model = Model[Map[Cell], PathBrain, Robot[Cell]]()
+        mail_factory = RandomAlwaysReadyMail(model, range(1, 10))
+        model.set_map(import_map(model, import_json("data/map1-simple.json"), mail_factory)[0])
+        robot_type = RobotType(1, 1, 1, 1)
+        model.set_brain(PathBrain(model, robot_type))
+        model.brain.priority_queue = queue
+        for position in starts:
+            robot = Robot(model, robot_type, position, Direction.down)
+            model.brain.robots_rests[robot] = position
+            model.add_robot(robot)
+        start = time.perf_counter()
+        model.run(run_time)
+        print(f"PathBrain, {queue.__name__}: {time.perf_counter() - start:.3f}s, "
+              f"{model.delivered_mails} mails")
+
+
+grid_benchmark()
+path_brain_benchmark()
@@ -0,0 +1,18 @@
+import sys
+
+from sweep import SweepPoint, grid, points, run_sweep, write_table
+
+if __name__ == "__main__":
+    base = SweepPoint(
+        map="data/small_map.json",
+        positions="data/example/position.json",
+        brain="brains.ant_brain.AntBrain",
+        brain_params=(("q", 0), ("Q", 10)),
+        wait_time=0.5,
+        update_period=30000,
+        time=100000,
+        warmup=300000,
+    )
+    settings = grid(fleet_size=(1, 2, 3), p=(1.1, 1.5, 2), rho=(0.1, 0.5))
+    rows = run_sweep(points(base, settings, replications=5), cache_dir=".sweep-cache")
+    write_table(rows, sys.stdout)
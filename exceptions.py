@@ -46,6 +46,11 @@ class IncorrectOutput(ModellingException):
         super().__init__(f"{cell} is not correct output for {mail}, expected {mail.destination}")
 
 
+class UnreachablePath(ModellingException):
+    def __init__(self, message: str = "Unreachable path."):
+        super().__init__(message)
+
+
 class PositionOutOfMap(ModellingException):
     def __init__(self, position: "Position"):
         super().__init__(f"{position} is out of map.")
@@ -0,0 +1,140 @@
+import json
+import typing
+
+from structures import Direction
+from observers import Observer
+
+if typing.TYPE_CHECKING:
+    import io
+    from robot import Robot
+    from structures import Position, Mail
+
+# state of robot is [x, y, direction value, 1 if it has mail else 0],
+# change is [robot index, duration, *state after action]
+State = list[int]
+Change = list[float]
+
+_VERSION = 1
+
+
+class FrameWriter(Observer):
+    """
+    Writes states of `robots` for visualization as json lines while model runs:
+    header, then for each time with started actions the changes
+    (state robot gets to and time of getting there),
+    every `keyframe_period` time states of all robots before changes of this time are written
+    (the first keyframe is at `time`).
+    Turn by 180 degrees is written as two turns by 90.
+    Only changes of current time are kept in memory.
+    """
+    def __init__(self, file: "io.TextIOWrapper",
+                 robots: "typing.Sequence[Robot[typing.Any]]",
+                 time: float = 0,
+                 keyframe_period: float = 100):
+        self._file = file
+        self._indexes = {robot: i for i, robot in enumerate(robots)}
+        self._states: list[State] = [
+            [robot.position.x, robot.position.y, robot.direction.value, int(robot.mail is not None)]
+            for robot in robots]
+        self._keyframe_period = keyframe_period
+        self._next_keyframe = time
+        self._changes: dict[float, list[Change]] = {}
+        self._write({"version": _VERSION, "robots": len(robots),
+                     "time": time, "keyframe_period": keyframe_period})
+        self._write_keyframes(time)
+
+    def _write(self, data: dict[str, typing.Any]):
+        self._file.write(json.dumps(data, separators=(',', ':')))
+        self._file.write('\n')
+
+    def _write_keyframes(self, time: float):
+        """keyframes until `time` including it"""
+        while self._next_keyframe <= time:
+            self._write({"time": self._next_keyframe, "keyframe": self._states})
+            self._next_keyframe += self._keyframe_period
+
+    def _write_until(self, time: float):
+        """changes (and keyframes) before `time`"""
+        for change_time in sorted(t for t in self._changes if t < time):
+            changes = self._changes.pop(change_time)
+            self._write_keyframes(change_time)
+            for i, _, *state in changes:
+                self._states[int(i)] = typing.cast(State, state)
+            self._write({"time": change_time, "changes": changes})
+
+    def _add(self, time: float, change: Change):
+        self._changes.setdefault(time, []).append(change)
+
+    @typing.override
+    def on_action(self, time: float, robot: "Robot[typing.Any]",
+                  current_position: "Position",
+                  current_direction: Direction,
+                  current_mail: "Mail | None",
+                  action: "Robot.Action",
+                  time_to_do: float,
+                  expected_position: "Position",
+                  expected_direction: Direction,
+                  expected_mail: "Mail | None"):
+        if self._changes:
+            self._write_until(time)
+        i = self._indexes[robot]
+        mail = int(expected_mail is not None)
+        if Direction.turn_count(current_direction, expected_direction) == 2:
+            half = time_to_do / 2
+            self._add(time, [i, half, current_position.x, current_position.y,
+                             (current_direction.value + 1) % 4, mail])
+            time += half
+            time_to_do = half
+        self._add(time, [i, time_to_do, expected_position.x, expected_position.y,
+                         expected_direction.value, mail])
+
+    @typing.override
+    def flush(self):
+        """writes all changes"""
+        self._write_until(float('inf'))
+        self._file.flush()
+
+
+class FrameReader:
+    """Reads file written by `FrameWriter`"""
+    def __init__(self, file: "io.TextIOWrapper"):
+        self._file = file
+        header = json.loads(file.readline())
+        if header.get("version") != _VERSION:
+            raise ValueError("Not a frame log.")
+        self.robots: int = header["robots"]
+        self.time: float = header["time"]
+        self.keyframe_period: float = header["keyframe_period"]
+
+    def __iter__(self) -> typing.Iterator[tuple[float, list[State] | None, list[Change]]]:
+        """yields time, states of all robots (for keyframe) or None and changes"""
+        for line in self._file:
+            data = json.loads(line)
+            yield data["time"], data.get("keyframe"), data.get("changes", [])
+
+    def window(self, start: float | None = None, end: float = float('inf')
+               ) -> tuple[list[State], list[tuple[float, list[Change]]]]:
+        """
+        states before `start` and changes from `start` until `end` (not including it),
+        states are restored from the last keyframe not after `start`,
+        by default `start` is the start of the record
+        """
+        if start is None:
+            start = self.time
+        states: list[State] | None = None
+        changes: list[tuple[float, list[Change]]] = []
+        for time, keyframe, time_changes in self:
+            if time >= end:
+                break
+            if keyframe is not None:
+                if time <= start:
+                    states = keyframe
+            elif time < start:
+                if states is not None:
+                    for i, _, *state in time_changes:
+                        states[int(i)] = typing.cast(State, state)
+            else:
+                changes.append((time, time_changes))
+        if states is None:
+            raise ValueError(f"No keyframe before {start}.")
+        return states, changes
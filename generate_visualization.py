@@ -1,18 +1,26 @@
 import json
 from structures import Position, Map
 from cell import Cell
+from frame_log import FrameReader
 
 CELL_SIZE = 30
 CELL_SPACE = 3
 SPEED = 0.5
 MOVE = CELL_SIZE + CELL_SPACE
 
-def generate(map_: Map[Cell], record: str, output: str):
+def generate(map_: Map[Cell], record: str, output: str,
+             start: float | None = None, end: float = float('inf')):
+    """
+    visualizes `record` written by `Model.record` from `start` until `end`,
+    by default from the start of the record
+    """
 
     with open(record) as file:
-        json_data = json.load(file)
-        data: list[list[tuple[int, int, int, int, bool]]] = json_data['data']
-        init: list[tuple[int, int, int, int, bool]] = json_data['init']
+        reader = FrameReader(file)
+        if start is None:
+            start = reader.time
+        init, changes = reader.window(start, end)
+    data = [[time - start, time_changes] for time, time_changes in changes]
 
     with open(output, 'w') as file:
         file.write(
@@ -68,14 +76,14 @@ height='''+str(map_.n*(MOVE))+'''px>
         file.write("</g>")
         for i in range(len(init)):
             file.write(f'''<g class=robot id=r{i} \
-transform="translate({init[i][2]*MOVE + CELL_SIZE/2}, \
-{init[i][1]*MOVE + CELL_SIZE/2})\
-rotate({-90*init[i][3]})" mail={'true' if init[i][4] else 'false'}>
+transform="translate({init[i][1]*MOVE + CELL_SIZE/2}, \
+{init[i][0]*MOVE + CELL_SIZE/2})\
+rotate({-90*init[i][2]})" mail={'true' if init[i][3] else 'false'}>
     <rect width=20 height=20 x=-10 y=-10 />
     <rect class=mail width=10 height=10 x=-5 y=-5 />
     <rect width=3 height=8 x=-14 y=2 />
     <rect width=3 height=8 x=11 y=2 />
     </g>\n''')
         file.write("</g></svg>")
-        file.write(f"<script>data={json.dumps(data)};CELL_SIZE={CELL_SIZE};CELL_SPACE={CELL_SPACE};MOVE={MOVE};SPEED={SPEED}</script>")
+        file.write(f"<script>init={json.dumps(init)};data={json.dumps(data)};CELL_SIZE={CELL_SIZE};CELL_SPACE={CELL_SPACE};MOVE={MOVE};SPEED={SPEED}</script>")
         file.write("<script>" + open("vis.js").read() + "</script>")
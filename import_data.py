@@ -1,6 +1,9 @@
 import csv
+import importlib.util
+import inspect
 import json
 import random
+import sys
 import simpy
 import simpy.resources.store
 import typing
@@ -8,11 +11,13 @@ import typing
 from structures import Map, Direction, Position
 from cell import SafeCell, MailInputGetter, Cell
 from robot import RobotType, Robot, SafeRobot
-from brains import OnlineBrain
+from brains import Brain, OnlineBrain, DirectionBrain
 from exceptions import InvalidDataFormat
 from typing import Any
 from modelling import Model
 from mail_factories import RandomAlwaysReadyMail
+from maps import OneWayMap, DirectionMap
+from precompute import PrecomputeCache
 
 CellT = typing.TypeVar("CellT", bound=Cell)
 RobotT = typing.TypeVar("RobotT", bound=Robot[Cell])
@@ -194,3 +199,85 @@ def import_distributions(env: simpy.Environment, data: dict[str, typing.Any],
         else:
             raise ValueError("not all inputs are present")
     return RandomAlwaysReadyMail(env, lambda input: random.choices(outputs, result[input])[0])
+
+def import_brains(file_path: str) -> list[type[Brain[Any, Any]]]:
+    """returns all classes inherited from `Brain` in file `file_path`"""
+    spec = importlib.util.spec_from_file_location("algorithm", file_path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Can not import {file_path}")
+    algorithm = importlib.util.module_from_spec(spec)
+    sys.modules["algorithm"] = algorithm
+    spec.loader.exec_module(algorithm)
+    brains: list[type[Brain[Any, Any]]] = []
+    for name, obj in inspect.getmembers(algorithm):
+        if (inspect.isclass(obj)
+                and 'Brain' in (i.__name__ for i in obj.__mro__)
+                and name != "Brain"
+                and name != "OnlineBrain"):
+            brains.append(obj)
+    return brains
+
+def build_model(map_data: dict[str, typing.Any],
+                robot_type: RobotType,
+                position_data: dict[str, typing.Any],
+                distribution_data: dict[str, typing.Any] | None,
+                brain: type[Brain[Any, Any]],
+                brain_params: dict[str, typing.Any] | None = None,
+                fleet_size: int | None = None,
+                wait_time: float = -1,
+                precompute_cache: PrecomputeCache | None = None,
+                ) -> Model[Any, Brain[Any, Any], Any]:
+    """returns `Model` from dictionaries (gotten from .json),
+    `brain` is created with `brain_params` as keyword arguments
+    (and `robot_type` if it accepts it).
+    `OnlineBrain` gets map of `SafeCell`s and `SafeRobot`s waiting for cells
+    at most `wait_time`, `DirectionBrain` gets random `OneWayMap`.
+    Only first `fleet_size` robots are used (all by default).
+    Without `distribution_data` destinations are uniform.
+    `precompute_cache` is used by `DirectionMap`
+    and given to brains with `precompute_cache` parameter."""
+    model = Model[Any, Brain[Any, Any], Any]()
+    inputs, outputs = import_map_stations(map_data)
+    if distribution_data is None:
+        factory = RandomAlwaysReadyMail(model, outputs)
+    else:
+        factory = import_distributions(model, distribution_data, inputs, outputs)
+    robots_data = position_data["robots"]
+    if fleet_size is None:
+        fleet_size = len(robots_data)
+    elif len(robots_data) < fleet_size:
+        raise ValueError(f"less than {fleet_size} robots are given")
+
+    safe = issubclass(brain, OnlineBrain)
+    if safe:
+        map_ = import_safe_map(model, map_data, factory)[0]
+        if issubclass(brain, DirectionBrain):
+            map_ = DirectionMap.generate_shortest(OneWayMap.generate_random(map_), precompute_cache)
+    else:
+        map_ = import_map(model, map_data, factory)[0]
+    model.set_map(map_)
+
+    params = {} if brain_params is None else dict(brain_params)
+    if "robot_type" in inspect.signature(brain).parameters:
+        params["robot_type"] = robot_type
+    if precompute_cache is not None and "precompute_cache" in inspect.signature(brain).parameters:
+        params["precompute_cache"] = precompute_cache
+    model.set_brain(brain(model, **params))
+
+    for data in robots_data[:fleet_size]:
+        if safe:
+            model.add_robot(SafeRobot(model, robot_type, Position(data['x'], data['y']),
+                                      import_direction(data['direction']), wait_time))
+        else:
+            model.add_robot(import_robot(model, data, robot_type, Robot[Cell]))
+    return model
+
+def import_model(map_data: dict[str, typing.Any],
+                 robot_type_data: dict[str, typing.Any],
+                 position_data: dict[str, typing.Any],
+                 distribution_data: dict[str, typing.Any],
+                 brain: type[Brain[Any, Any]]
+                 ) -> Model[Any, Brain[Any, Any], Any]:
+    """returns `Model` from dictionaries (gotten from .json) as in `__main__`"""
+    return build_model(map_data, import_robot_type(robot_type_data), position_data,
+                       distribution_data, brain)
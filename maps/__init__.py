@@ -1,8 +1,9 @@
-from maps.direction_map import GenericDirectionMap, DirectionMap, DirectionCell
+from maps.direction_map import GenericDirectionMap, DirectionMap, DirectionCell, DirectionTable
 from maps.one_way_map import OneWayMap
 
 __all__ = ["GenericDirectionMap",
            "DirectionMap",
            "DirectionCell",
+           "DirectionTable",
            "OneWayMap"
            ]
@@ -1,9 +1,86 @@
+import array
+import collections.abc
 import typing
 import simpy
 
 from structures import Map, Direction, Position
 from cell import SafeCell, MailInputGetter
 from maps.one_way_map import OneWayMap
+from precompute import PrecomputeCache, map_key
+
+NO_DIRECTION = 255
+_DIRECTIONS = tuple(Direction) # by value
+
+
+class DirectionTable:
+    """
+    Direction to go for each destination id and cell id,
+    one byte (`Direction.value` or `NO_DIRECTION`) per pair,
+    rows of destinations follow each other.
+    """
+    def __init__(self, ids: typing.Sequence[int], size: int,
+                 data: typing.Sequence[int] | None = None):
+        self.ids = tuple(ids)
+        self._rows = {id_: i*size for i, id_ in enumerate(self.ids)}
+        self.data: typing.Sequence[int] = \
+            array.array('B', [NO_DIRECTION]) * (len(self.ids)*size) if data is None else data
+
+    def direction(self, id_: int, cell: int) -> Direction:
+        """raises `KeyError` if destination is unreachable from `cell`"""
+        if (value := self.data[self._rows[id_] + cell]) == NO_DIRECTION:
+            raise KeyError(id_)
+        return _DIRECTIONS[value]
+
+    @staticmethod
+    def shortest(map_: Map[typing.Any], destinations: dict[int, Position]) -> "DirectionTable":
+        """first direction of shortest (by cell count) path, by BFS from each destination"""
+        # for each cell, cells from which robot gets to it and direction to go there
+        predecessors: list[list[tuple[int, int]]] = [[] for _ in range(map_.size)]
+        for cell, previous_cells in enumerate(predecessors):
+            for direction in (Direction.up, Direction.left,
+                              Direction.down, Direction.right):
+                new_cell = map_.neighbor(cell, direction)
+                if new_cell != -1 and map_.successor(new_cell, direction.inverse) == cell:
+                    previous_cells.append((new_cell, direction.inverse.value))
+        table = DirectionTable(tuple(destinations), map_.size)
+        data = typing.cast("array.array[int]", table.data)
+        for id_, position in destinations.items():
+            row = table._rows[id_]
+            start = map_.cell_id(position)
+            used = bytearray(map_.size)
+            used[start] = True
+            queue = [start]
+            for cell in queue:
+                for previous, direction in predecessors[cell]:
+                    if not used[previous]:
+                        used[previous] = True
+                        data[row + previous] = direction
+                        queue.append(previous)
+        return table
+
+
+class CellDirections(collections.abc.Mapping[int, Direction]):
+    """directions from one cell of `DirectionTable`"""
+    def __init__(self, table: DirectionTable, cell: int):
+        self._table = table
+        self._cell = cell
+
+    def __getitem__(self, id_: int) -> Direction:
+        return self._table.direction(id_, self._cell)
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return (id_ for id_ in self._table.ids if id_ in self)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @typing.override
+    def __contains__(self, id_: object) -> bool:
+        try:
+            self[id_] # type: ignore
+        except KeyError:
+            return False
+        return True
 
 
 class DirectionCell(SafeCell):
@@ -18,8 +95,8 @@ class DirectionCell(SafeCell):
 
     def __init__(self, env: simpy.Environment,
                  get_mail_input: MailInputGetter,
-                 to_inputs: dict[int, Direction],
-                 to_outputs: dict[int, Direction],
+                 to_inputs: typing.Mapping[int, Direction],
+                 to_outputs: typing.Mapping[int, Direction],
                  input_id: int | None = None,
                  output_id: int | None = None,
                  free: bool = True):
@@ -29,8 +106,8 @@ class DirectionCell(SafeCell):
 
     @staticmethod
     def from_cell(cell: SafeCell,
-                 to_inputs: dict[int, Direction],
-                 to_outputs: dict[int, Direction]):
+                 to_inputs: typing.Mapping[int, Direction],
+                 to_outputs: typing.Mapping[int, Direction]):
         result = DirectionCell.__new__(DirectionCell)
         result.__dict__.update(cell.__dict__)
         result._to_inputs = to_inputs
@@ -41,44 +118,40 @@ class DirectionCell(SafeCell):
 TDirectionCell = typing.TypeVar("TDirectionCell", bound=DirectionCell)
 
 class GenericDirectionMap(Map[TDirectionCell]):
-    def __init__(self, map_: typing.Sequence[typing.Sequence[TDirectionCell]]):
+    """
+    Directions are kept in `to_inputs` and `to_outputs` tables,
+    cells give views of them.
+    """
+    def __init__(self, map_: typing.Sequence[typing.Sequence[TDirectionCell]],
+                 to_inputs: DirectionTable | None = None,
+                 to_outputs: DirectionTable | None = None):
         super().__init__(map_)
+        self.to_inputs = to_inputs
+        self.to_outputs = to_outputs
 
     @staticmethod
-    def generate_shortest(map_: OneWayMap[SafeCell]) -> "GenericDirectionMap[DirectionCell]":
-        """generate shortest (by cell count) path for each destination."""
-        to_inputs: list[list[dict[int, Direction]]] = \
-            [[{} for _ in range(map_.m)] for _ in range(map_.n)]
-        to_outputs: list[list[dict[int, Direction]]] = \
-            [[{} for _ in range(map_.m)] for _ in range(map_.n)]
-        used: list[list[bool]]
-        go_next: list[Position]
-        def dfs(array: list[list[dict[int, Direction]]],
-                id: int, pos: Position):
-            if used[pos.x][pos.y]:
-                return
-            used[pos.x][pos.y] = True
-            for direction in (Direction.up, Direction.left,
-                              Direction.down, Direction.right):
-                new_position = pos.get_next_on(direction)
-                if (map_.has(new_position) and
-                        map_.can_go(new_position, direction.inverse) and
-                        not used[new_position.x][new_position.y]):
-                    array[new_position.x][new_position.y][id] = direction.inverse
-                    go_next.append(new_position)
-
-        for type_ in ('inputs', 'outputs'):
-            d: dict[int, Position] = map_.__dict__["_" + type_]
-            for id_, start in d.items():
-                used = [[False for _ in range(map_.m)] for _ in range(map_.n)]
-                go_next = [start]
-                i = 0
-                while i < len(go_next):
-                    dfs(locals()[f"to_{type_}"], id_, go_next[i])
-                    i += 1
+    def generate_shortest(map_: OneWayMap[SafeCell],
+                          cache: PrecomputeCache | None = None) -> "GenericDirectionMap[DirectionCell]":
+        """
+        generate shortest (by cell count) path for each destination.
+        With `cache` tables are stored there by `map_key`.
+        """
+        if cache is None:
+            to_inputs = DirectionTable.shortest(map_, map_.inputs)
+            to_outputs = DirectionTable.shortest(map_, map_.outputs)
+        else:
+            key = map_key(map_)
+            to_inputs = DirectionTable(map_.inputs, map_.size, cache.get(
+                f"directions-inputs-{key}", 'B',
+                lambda: typing.cast("array.array[int]", DirectionTable.shortest(map_, map_.inputs).data)))
+            to_outputs = DirectionTable(map_.outputs, map_.size, cache.get(
+                f"directions-outputs-{key}", 'B',
+                lambda: typing.cast("array.array[int]", DirectionTable.shortest(map_, map_.outputs).data)))
         return GenericDirectionMap(
-            [[DirectionCell.from_cell(map_._map[x][y], to_inputs[x][y], 
-                                      to_outputs[x][y])
-              for y in range(map_.m)] for x in range(map_.n)])
+            [[DirectionCell.from_cell(map_._map[x][y],
+                                      CellDirections(to_inputs, cell := map_.cell_id(Position(x, y))),
+                                      CellDirections(to_outputs, cell))
+              for y in range(map_.m)] for x in range(map_.n)],
+            to_inputs, to_outputs)
 
 DirectionMap = GenericDirectionMap[DirectionCell]
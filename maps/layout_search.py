@@ -0,0 +1,123 @@
+import collections
+import concurrent.futures
+import dataclasses
+import itertools
+import os
+import random
+import typing
+
+from brains import DirectionBrain
+from import_data import import_safe_map, import_map_stations
+from mail_factories import RandomAlwaysReadyMail
+from maps.direction_map import DirectionMap
+from maps.one_way_map import OneWayMap
+from modelling import Model
+from robot import SafeRobot
+from structures import Map, Position, Direction, RobotType
+
+INF = float('inf')
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class LayoutScore:
+    """
+    Score of layout generated by `OneWayMap.generate_random` with `random.Random(seed)`.
+    `unreachable` is number of pairs (free cell, destination) without route,
+    `mean_trip` is mean number of cells of route from input to output and back,
+    `delivered` is delivered mails of simulation (if it was run).
+    """
+    seed: int
+    unreachable: int
+    mean_trip: float
+    delivered: int | None = None
+
+    def key(self):
+        """less is better"""
+        if self.delivered is None:
+            return (self.unreachable, self.mean_trip)
+        return (-self.delivered, self.unreachable, self.mean_trip)
+
+
+def _distances_to(predecessors: list[list[int]], goal: int) -> list[float]:
+    """number of moves to `goal` for each cell id, by BFS on reversed moves"""
+    result = [INF] * len(predecessors)
+    result[goal] = 0
+    queue = collections.deque([goal])
+    while queue:
+        cell = queue.popleft()
+        for previous in predecessors[cell]:
+            if result[previous] == INF:
+                result[previous] = result[cell] + 1
+                queue.append(previous)
+    return result
+
+
+def _predecessors(map_: Map[typing.Any]) -> list[list[int]]:
+    result: list[list[int]] = [[] for _ in range(map_.size)]
+    for successors in map_.successors:
+        for cell, successor in enumerate(successors):
+            if successor != -1:
+                result[successor].append(cell)
+    return result
+
+
+def score_routes(map_: Map[typing.Any]) -> tuple[int, float]:
+    """`unreachable` and `mean_trip` of `LayoutScore`"""
+    free = [map_.cell_id(position) for position in map_]
+    inputs = [map_.cell_id(position) for position in map_.inputs.values()]
+    outputs = [map_.cell_id(position) for position in map_.outputs.values()]
+    predecessors = _predecessors(map_)
+    to_inputs = [_distances_to(predecessors, cell) for cell in inputs]
+    to_outputs = [_distances_to(predecessors, cell) for cell in outputs]
+    unreachable = sum(distances[cell] == INF
+                      for distances in itertools.chain(to_inputs, to_outputs)
+                      for cell in free)
+    trips = [to_outputs[j][input_] + to_inputs[i][output]
+             for i, input_ in enumerate(inputs)
+             for j, output in enumerate(outputs)]
+    finite = [trip for trip in trips if trip != INF]
+    return unreachable, sum(finite) / len(finite) if finite else INF
+
+
+def evaluate_layout(map_data: dict[str, typing.Any], seed: int,
+                    robots: typing.Sequence[tuple[Position, Direction]] = (),
+                    robot_type: RobotType = RobotType(1, 1, 1, 1),
+                    time: float = 0) -> LayoutScore:
+    """
+    generates layout for map from `map_data` (gotten from .json) with `seed`
+    and scores it, if `time` is positive `robots` are run with `DirectionBrain` for `time`
+    """
+    model = Model[DirectionMap, DirectionBrain, SafeRobot]()
+    factory = RandomAlwaysReadyMail(model, import_map_stations(map_data)[1])
+    way_map = OneWayMap.generate_random(
+        import_safe_map(model, map_data, factory)[0], random.Random(seed))
+    unreachable, mean_trip = score_routes(way_map)
+    if time <= 0 or not robots:
+        return LayoutScore(seed, unreachable, mean_trip)
+    random.seed(seed)
+    model.set_map(DirectionMap.generate_shortest(way_map))
+    model.set_brain(DirectionBrain(model))
+    for position, direction in robots:
+        model.add_robot(SafeRobot(model, robot_type, position, direction))
+    model.run(time)
+    return LayoutScore(seed, unreachable, mean_trip, model.delivered_mails)
+
+
+def search_layouts(map_data: dict[str, typing.Any], count: int, seed: int = 0,
+                   robots: typing.Sequence[tuple[Position, Direction]] = (),
+                   robot_type: RobotType = RobotType(1, 1, 1, 1),
+                   time: float = 0,
+                   workers: int | None = None) -> list[LayoutScore]:
+    """
+    scores `count` random layouts with seeds from `seed` in process pool,
+    returns scores from the best.
+    Best layout is `OneWayMap.generate_random(map_, random.Random(scores[0].seed))`.
+    param workers: number of processes, by default number of processors
+    """
+    seeds = range(seed, seed + count)
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        scores = list(executor.map(
+            evaluate_layout, itertools.repeat(map_data), seeds, itertools.repeat(robots),
+            itertools.repeat(robot_type), itertools.repeat(time),
+            chunksize=max(1, count // (4 * (workers or os.cpu_count() or 1)))))
+    return sorted(scores, key=LayoutScore.key)
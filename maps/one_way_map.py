@@ -40,34 +40,48 @@ class OneWayMap(Map[TCell]):
                 return bool(self._horizontal[pos.x][pos.y] & OneWayMap.Way.forward)
 
     @staticmethod
-    def generate_random(map_: Map[TCell]):
-        """generates random connected (if possible) map"""
+    def generate_random(map_: Map[TCell], rng: random.Random | None = None):
+        """
+        generates random connected (if possible) map
+        by depth-first search from the first input, `rng` is `random` by default
+        """
+        shuffle = random.shuffle if rng is None else rng.shuffle
         horizontal = [[OneWayMap.Way.unknown for _ in range(map_._m - 1)]
                       for _ in range(map_._n)]
         vertical = [[OneWayMap.Way.unknown for _ in range(map_._m)]
                     for _ in range(map_._n - 1)]
-        def generate(x: int, y: int):
-            directions = [Direction.up, Direction.left,
-                          Direction.down, Direction.right]
-            random.shuffle(directions)
-            for direction in directions:
+        def directions():
+            result = [Direction.up, Direction.left,
+                      Direction.down, Direction.right]
+            shuffle(result)
+            return iter(result)
+        start = map_.inputs[tuple(map_.inputs.keys())[0]]
+        # cells of current path with directions left to try
+        stack = [(start.x, start.y, directions())]
+        while stack:
+            x, y, left = stack[-1]
+            for direction in left:
                 match direction:
                     case Direction.up:
                         if x>0 and not vertical[x-1][y] and map_._map[x-1][y].free:
                             vertical[x-1][y] = OneWayMap.Way.backward
-                            generate(x-1, y)
+                            stack.append((x-1, y, directions()))
+                            break
                     case Direction.down:
                         if x<map_.n-1 and not vertical[x][y] and map_._map[x+1][y].free:
                             vertical[x][y] = OneWayMap.Way.forward
-                            generate(x+1, y)
+                            stack.append((x+1, y, directions()))
+                            break
                     case Direction.left:
                         if y>0 and not horizontal[x][y-1] and map_._map[x][y-1].free:
                             horizontal[x][y-1] = OneWayMap.Way.backward
-                            generate(x, y-1)
+                            stack.append((x, y-1, directions()))
+                            break
                     case Direction.right:
                         if y<map_.m-1 and not horizontal[x][y] and map_._map[x][y+1].free:
                             horizontal[x][y] = OneWayMap.Way.forward
-                            generate(x, y+1)
-        generate(map_.inputs[tuple(map_.inputs.keys())[0]].x,
-                 map_.inputs[tuple(map_.inputs.keys())[0]].y)
+                            stack.append((x, y+1, directions()))
+                            break
+            else:
+                stack.pop()
         return OneWayMap(map_._map, horizontal, vertical)
@@ -1,9 +1,10 @@
-import csv
 import simpy
 import math
-import json
 import typing
-import time
+
+from action_log import CsvActionWriter, ActionLogWriter
+from frame_log import FrameWriter
+from observers import Observer
 
 if typing.TYPE_CHECKING:
     import io
@@ -22,6 +23,9 @@ class Model(simpy.Environment, typing.Generic[MapT,  BrainT, RobotT]):
     - `set_map`
     - `set_brain`
     - `add_robot`
+
+    Recording, logging and metrics are `Observer`s added by `subscribe`,
+    actions are logged only if `LoggingObserver` is subscribed.
     """
     map: MapT
     brain: BrainT
@@ -33,8 +37,10 @@ class Model(simpy.Environment, typing.Generic[MapT,  BrainT, RobotT]):
         self._now: int
         super().__init__()
         self.robots = []
-        self.writer = None
+        self.observers: list[Observer] = []
         self._delivered_mails = 0
+        self._mail_count = 0
+        self._mail_count_reached: simpy.Event | None = None
 
     def set_map(self, map: MapT): # type: ignore
         self.map = map
@@ -50,13 +56,33 @@ class Model(simpy.Environment, typing.Generic[MapT,  BrainT, RobotT]):
         for robot in robots:
             self.add_robot(robot)
 
+    def subscribe(self, observer: Observer):
+        self.observers.append(observer)
+
+    def unsubscribe(self, observer: Observer):
+        self.observers.remove(observer)
+
     def deliver_mail(self, robot: RobotT, mail: "Mail"):
         # add some validation?
         self._delivered_mails += 1
+        for observer in self.observers:
+            observer.on_mail_delivered(self._now, robot, mail)
+        if (self._mail_count_reached is not None
+                and self._delivered_mails >= self._mail_count):
+            self._mail_count_reached.succeed()
+            self._mail_count_reached = None
 
     def run_for_mails(self, mail_count: int):
-        while (self._delivered_mails < mail_count):
-            self.run(self._now + 1)
+        """runs until `mail_count` mails are delivered in total,
+        stops right at the event that delivers the last of them"""
+        if self._delivered_mails >= mail_count:
+            return
+        self._mail_count = mail_count
+        self._mail_count_reached = self.event()
+        try:
+            self.run(self._mail_count_reached)
+        finally:
+            self._mail_count_reached = None
 
     def test(self, time: float, count: int) -> tuple[float, float]:
         """runs `count` times for `time`
@@ -71,23 +97,34 @@ class Model(simpy.Environment, typing.Generic[MapT,  BrainT, RobotT]):
         std = math.sqrt(sum((i-average)**2 for i in results)/(count-1))
         return average, std
 
-    def _write_record_header(self):
-        if self.writer is None: return
-        self.writer.writerow((
-            "time", "robot",
-            "x", "y", "direction", "mail",
-            "action", "time to do",
-            "new x", "new y", "new direction", "new mail"))
+    def _record(self, file: "io.TextIOWrapper | typing.BinaryIO",
+                binary: bool, compress: bool,
+                run: typing.Callable[[], None]):
+        writer: Observer
+        if binary:
+            writer = ActionLogWriter(file, compress=compress) # type: ignore
+        else:
+            writer = CsvActionWriter(file) # type: ignore
+        self.subscribe(writer)
+        try:
+            run()
+        finally:
+            self.unsubscribe(writer)
+            writer.flush()
 
-    def record_actions_for_mails(self, mail_count: int, file: "io.TextIOWrapper"):
-        self.writer = csv.writer(file)
-        self._write_record_header()
-        self.run_for_mails(mail_count)
+    def record_actions_for_mails(self, mail_count: int,
+                                 file: "io.TextIOWrapper | typing.BinaryIO",
+                                 binary: bool = False, compress: bool = False):
+        """records all actions in csv `file` or,
+        if `binary`, in binary `file` readable by `action_log.ActionLogReader`"""
+        self._record(file, binary, compress, lambda: self.run_for_mails(mail_count))
 
-    def record_actions_for_time(self, time: int, file: "io.TextIOWrapper"):
-        self.writer = csv.writer(file)
-        self._write_record_header()
-        self.run(self.now + time)
+    def record_actions_for_time(self, time: int,
+                                file: "io.TextIOWrapper | typing.BinaryIO",
+                                binary: bool = False, compress: bool = False):
+        """records all actions in csv `file` or,
+        if `binary`, in binary `file` readable by `action_log.ActionLogReader`"""
+        self._record(file, binary, compress, lambda: self.run(self.now + time))
 
     def record_action(self, robot: "Robot[Any]",
                      current_position: "Position",
@@ -98,72 +135,26 @@ class Model(simpy.Environment, typing.Generic[MapT,  BrainT, RobotT]):
                      expected_position: "Position",
                      expected_direction: "Direction",
                      expected_mail: "Mail | None"):
-        if self.writer:
-            self.writer.writerow((
-                self._now, robot.id,
-                current_position.x, current_position.y, current_direction.name,
-                None if current_mail is None else current_mail.destination,
-                action.name, time_to_do,
-                expected_position.x, expected_position.y, expected_direction.name,
-                None if expected_mail is None else expected_mail.destination))
-
-    def record(self, time_: int, file_name: str = 'record.json'):
+        """notifies observers, robots call it only if `observers` is not empty"""
+        for observer in self.observers:
+            observer.on_action(
+                self._now, robot,
+                current_position, current_direction, current_mail,
+                action, time_to_do,
+                expected_position, expected_direction, expected_mail)
+
+    def record(self, time_: int, file_name: str = 'record.jsonl',
+               keyframe_period: float = 100):
         """
-        obsolete use `record_actions`_
-        records to `file_name`
+        records changes of robots' states for `generate_visualization.generate`
+        to `file_name` while running for `time_`,
+        all states are written every `keyframe_period`
         """
-        init_pos: list[tuple[int, int, int, int, bool]] = []
-        for robot in self.robots:
-            init_pos.append((0, robot.position.x, robot.position.y,
-                            robot.direction.value, robot.mail is not None))
-        data: list[list[tuple[int, int, int, int, bool]]] = [init_pos.copy()]
-        t = time.time()
-        try:
-            for _ in range(1, time_+1):
-                self.run(1+self.now)
-                data.append([])
-                for j, robot in enumerate(self.robots):
-                    data[-1].append((0, robot.position.x, robot.position.y,
-                                    robot.direction.value, robot.mail is not None))
-                    # turn 180
-                    if (robot.direction.value != data[-2][j][3] and
-                            (robot.direction.value - data[-2][j][3]) % 2 == 0):
-                        start = -1-2*robot.type.time_to_turn
-                        if start < -len(data): continue
-                        data[start][j] = (robot.type.time_to_turn,
-                                          data[start][j][1], data[start][j][2],
-                                          (data[start][j][3]+1)%4, data[start][j][4])
-                        mid = -1-robot.type.time_to_turn
-                        data[mid][j] = (robot.type.time_to_turn,
-                                          data[mid][j][1], data[mid][j][2],
-                                          data[-1][j][3], data[mid][j][4])
-                    # take
-                    elif data[-1][j][4] and not data[-2][j][4]:
-                        start = -1-robot.type.time_to_take
-                        data[start][j] = (robot.type.time_to_take,
-                                          data[start][j][1], data[start][j][2],
-                                          data[start][j][3], True)
-                    # put
-                    elif not data[-1][j][4] and data[-2][j][4]:
-                        start = -1-robot.type.time_to_put
-                        data[start][j] = (robot.type.time_to_put,
-                                          data[start][j][1], data[start][j][2],
-                                          data[start][j][3], False)
-                    # turn 90
-                    elif data[-1][j][3] != data[-2][j][3]:
-                        start = -1-robot.type.time_to_turn
-                        data[start][j] = (robot.type.time_to_turn,
-                                          data[start][j][1], data[start][j][2],
-                                          data[-1][j][3], data[start][j][4])
-                    # move
-                    elif data[-1][j][1] != data[-2][j][1] or data[-1][j][2] != data[-2][j][2]:
-                        start = -1-robot.type.time_to_move
-                        data[start][j] = (robot.type.time_to_move,
-                                          data[-1][j][1], data[-1][j][2],
-                                          data[start][j][3], data[start][j][4])
-        except Exception as exc:
-            raise exc
-        finally:
-            print(f"took {time.time() - t} s")
-            with open(file_name, 'w') as file:
-                json.dump({'init': init_pos, 'data': data}, file)
+        with open(file_name, 'w') as file:
+            writer = FrameWriter(file, self.robots, self.now, keyframe_period)
+            self.subscribe(writer)
+            try:
+                self.run(self.now + time_)
+            finally:
+                self.unsubscribe(writer)
+                writer.flush()
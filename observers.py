@@ -0,0 +1,87 @@
+import collections
+import logging
+import typing
+
+if typing.TYPE_CHECKING:
+    from robot import Robot
+    from structures import Position, Direction, Mail
+
+
+class Observer:
+    """Base class for model observers subscribed by `Model.subscribe`,
+    does nothing by default.
+    Robots do not prepare any arguments if model does not have observers."""
+    def on_action(self, time: float, robot: "Robot[typing.Any]",
+                  current_position: "Position",
+                  current_direction: "Direction",
+                  current_mail: "Mail | None",
+                  action: "Robot.Action",
+                  time_to_do: float,
+                  expected_position: "Position",
+                  expected_direction: "Direction",
+                  expected_mail: "Mail | None") -> None:
+        """Called when robot starts action"""
+
+    def on_mail_delivered(self, time: float, robot: "Robot[typing.Any]",
+                          mail: "Mail") -> None:
+        """Called when robot has put mail"""
+
+    def flush(self) -> None:
+        """Called when recording is finished"""
+
+
+class LoggingObserver(Observer):
+    """Logs actions with `logging.info`"""
+    def __init__(self, logger: logging.Logger | None = None):
+        self._logger = logging.getLogger() if logger is None else logger
+
+    @typing.override
+    def on_action(self, time: float, robot: "Robot[typing.Any]",
+                  current_position: "Position",
+                  current_direction: "Direction",
+                  current_mail: "Mail | None",
+                  action: "Robot.Action",
+                  time_to_do: float,
+                  expected_position: "Position",
+                  expected_direction: "Direction",
+                  expected_mail: "Mail | None"):
+        match action.name:
+            case "move":
+                self._logger.info("%s is moving to %s.", robot, expected_position)
+            case "take":
+                self._logger.info("%s is taking %s.", robot, expected_mail)
+            case "put":
+                self._logger.info("%s is putting %s.", robot, current_mail)
+            case _:
+                self._logger.info("%s is turning to %s.", robot, expected_direction)
+
+    @typing.override
+    def on_mail_delivered(self, time: float, robot: "Robot[typing.Any]", mail: "Mail"):
+        self._logger.info("%s delivered %s.", robot, mail)
+
+
+class MetricsObserver(Observer):
+    """Counts actions, time spent on them and delivered mails"""
+    def __init__(self):
+        self.actions = collections.Counter["Robot.Action"]()
+        self.action_time = collections.Counter["Robot.Action"]()
+        self.delivered_mails = 0
+        self.last_delivery_time: float | None = None
+
+    @typing.override
+    def on_action(self, time: float, robot: "Robot[typing.Any]",
+                  current_position: "Position",
+                  current_direction: "Direction",
+                  current_mail: "Mail | None",
+                  action: "Robot.Action",
+                  time_to_do: float,
+                  expected_position: "Position",
+                  expected_direction: "Direction",
+                  expected_mail: "Mail | None"):
+        self.actions[action] += 1
+        self.action_time[action] += time_to_do
+
+    @typing.override
+    def on_mail_delivered(self, time: float, robot: "Robot[typing.Any]", mail: "Mail"):
+        self.delivered_mails += 1
+        self.last_delivery_time = time
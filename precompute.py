@@ -0,0 +1,85 @@
+import array
+import hashlib
+import mmap
+import os
+import typing
+
+if typing.TYPE_CHECKING:
+    from structures import Map, RobotType
+
+
+def map_key(map_: "Map[typing.Any]", robot_type: "RobotType | None" = None) -> str:
+    """hash of map structure (moves and stations) and `robot_type`"""
+    return hashlib.sha256(repr((
+        map_.n, map_.m, map_.successors,
+        list(map_.inputs.items()), list(map_.outputs.items()),
+        robot_type)).encode()).hexdigest()[:32]
+
+
+class PrecomputeCache:
+    """
+    Arrays computed from map are stored in `directory`,
+    name of file must contain hash of everything data depends on (as `map_key`).
+    Stored arrays are loaded by `mmap`, so runs in different processes share memory.
+    If stored files take more than `max_size` bytes, least recently used are removed
+    (maps generated at random, as `OneWayMap.generate_random`, give new files each run).
+    """
+    def __init__(self, directory: str, max_size: int = 2**30):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, name: str, typecode: str,
+            compute: typing.Callable[[], "array.array[typing.Any]"]) -> typing.Sequence[typing.Any]:
+        """stored array `name` or result of `compute` which is stored"""
+        path = os.path.join(self.directory, f"{name}.{typecode}.bin")
+        if (data := self._load(path, typecode)) is not None:
+            return data
+        result = compute()
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            result.tofile(f)
+        os.replace(temp_path, path)
+        self._evict()
+        return result
+
+    def size(self) -> int:
+        """total size of stored files in bytes"""
+        return sum(size for _, size, _ in self._files())
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        """time of last use, size and path of each stored file"""
+        result: list[tuple[float, int, str]] = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".bin"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError: # removed by other process
+                        continue
+                    result.append((stat.st_mtime, stat.st_size, entry.path))
+        return result
+
+    def _evict(self):
+        """removes least recently used files until the rest fit in `max_size`"""
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError: # removed by other process or mapped on Windows
+                continue
+            total -= size
+
+    @staticmethod
+    def _load(path: str, typecode: str) -> typing.Sequence[typing.Any] | None:
+        try:
+            os.utime(path) # marks file as used for `_evict`
+            if os.path.getsize(path) == 0: # can not be mapped
+                return array.array(typecode)
+            with open(path, "rb") as f:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+        except FileNotFoundError:
+            return None
@@ -1,3 +1,4 @@
+import dataclasses
 import enum
 import logging
 import simpy
@@ -31,6 +32,20 @@ class Robot(typing.Generic[CellT]):
         def turn_to(direction: Direction):
             return Robot.Action(10 + direction.value)
 
+    @dataclasses.dataclass(frozen=True, slots=True)
+    class MacroAction:
+        """
+        Turn to `direction` (if it is not None) and then move `moves` cells forward
+        without asking brain. Each step is recorded and reserves cells as separate action,
+        the rest is dropped if robot can not move.
+        """
+        direction: Direction | None = None
+        moves: int = 1
+
+        def __post_init__(self):
+            if self.moves < 1:
+                raise ValueError("macro action must move at least one cell")
+
     _last_robot_id: int = 0
 
     @property
@@ -89,47 +104,50 @@ class Robot(typing.Generic[CellT]):
 
     def abort(self):
         if self._event.triggered:
-            logging.warn(f"Tried to abort {self}'s event.")
+            logging.warning("Tried to abort %s's event.", self)
             return False
-        logging.info(f"{self}'s event aborted.")
+        logging.info("%s's event aborted.", self)
         self._event.succeed()
         self._aborted = True
         return True
 
     def _idle(self):
-        logging.info(f"{self} is idle.")
+        logging.info("%s is idle.", self)
         yield self._new_abortable_event()
 
-    def _move(self) -> typing.Generator[simpy.Event, bool, None]:
+    def _move(self) -> typing.Generator[simpy.Event, typing.Any, bool]:
         next_position = self._position.get_next_on(self._direction)
+        # robot leaving next cell at this moment frees it first
+        yield self._model.timeout(0)
         if (self._model.map[next_position].reserved):
             self._collision_callback = True
-            return
+            return False
         request = self._model.map[next_position].reserve()
         yield request
-        self._model.record_action(
-            self, self._position, self._direction, self._mail,
-            Robot.Action.move, self._type.time_to_move,
-            next_position, self._direction, self._mail)
-        logging.info(f"{self} is moving to {next_position}.")
+        if self._model.observers:
+            self._model.record_action(
+                self, self._position, self._direction, self._mail,
+                Robot.Action.move, self._type.time_to_move,
+                next_position, self._direction, self._mail)
         yield self._model.timeout(self._type.time_to_move)
         self._model.map[self._position].unreserve(self._cell_request)
         self._position = next_position
         self._cell_request = request
+        return True
 
     def _take(self) -> typing.Generator[simpy.Event, Mail, None]:
         if self._mail is not None:
             raise DoubleMailTake(self)
-        logging.info(f"{self} is waiting for mail.")
+        logging.info("%s is waiting for mail.", self)
         mail = yield self._new_abortable_event(
             self._model.map[self._position].get_input())
         if self._aborted:
             return
-        self._model.record_action(
-            self, self._position, self._direction, None,
-            Robot.Action.take, self._type.time_to_turn,
-            self._position, self._direction, mail)
-        logging.info(f"{self} is taking {self._mail}.")
+        if self._model.observers:
+            self._model.record_action(
+                self, self._position, self._direction, None,
+                Robot.Action.take, self._type.time_to_take,
+                self._position, self._direction, mail)
         yield self._model.timeout(self._type.time_to_take)
         self._mail = mail
 
@@ -138,25 +156,32 @@ class Robot(typing.Generic[CellT]):
             raise MailToPutAbsence(self)
         if self._model.map[self.position].output_id != self._mail.destination:
             raise IncorrectOutput(self._mail, self._model.map[self.position])
-        self._model.record_action(
-            self, self._position, self._direction, self._mail,
-            Robot.Action.put, self._type.time_to_put,
-            self._position, self._direction, None)
-        logging.info(f"{self} is putting {self._mail}.")
+        if self._model.observers:
+            self._model.record_action(
+                self, self._position, self._direction, self._mail,
+                Robot.Action.put, self._type.time_to_put,
+                self._position, self._direction, None)
         yield self._model.timeout(self._type.time_to_put)
         self._model.deliver_mail(self, self._mail)
         self._mail = None
 
     def _turn(self, new_direction: Direction):
         turn_time = Direction.turn_count(self._direction, new_direction) * self._type.time_to_turn
-        self._model.record_action(
-            self, self._position, self._direction, self._mail,
-            Robot.Action.turn_to(new_direction), turn_time,
-            self._position, new_direction, self._mail)
-        logging.info(f"{self} is turning to {new_direction}.")
+        if self._model.observers:
+            self._model.record_action(
+                self, self._position, self._direction, self._mail,
+                Robot.Action.turn_to(new_direction), turn_time,
+                self._position, new_direction, self._mail)
         yield self._model.timeout(turn_time)
         self._direction = new_direction
 
+    def _macro(self, macro: "Robot.MacroAction"):
+        if macro.direction is not None:
+            yield from self._turn(macro.direction)
+        for _ in range(macro.moves):
+            if not (yield from self._move()):
+                return
+
     def _run(self):
         yield self._cell_request
         while True:
@@ -165,16 +190,18 @@ class Robot(typing.Generic[CellT]):
                 self._collision_callback = False
             match action := self._model.brain.get_next_action(self):
                 case Robot.Action.idle:
-                    yield self._model.process(self._idle())
+                    yield from self._idle()
                 case Robot.Action.move:
-                    yield self._model.process(self._move())
+                    yield from self._move()
                 case Robot.Action.take:
-                    yield self._model.process(self._take())
+                    yield from self._take()
                 case Robot.Action.put:
-                    yield self._model.process(self._put())
+                    yield from self._put()
                 case Robot.Action.turn_to_up | Robot.Action.turn_to_left\
                         | Robot.Action.turn_to_down | Robot.Action.turn_to_right:
-                    yield self._model.process(self._turn(Direction(action.value-10)))
+                    yield from self._turn(Direction(action.value-10))
+                case Robot.MacroAction():
+                    yield from self._macro(action)
     
     @typing.override
     def __repr__(self):
@@ -191,10 +218,10 @@ class SafeRobot(Robot["SafeCell"]):
         self.wait_time = wait_time
 
     @typing.override
-    def _move(self) -> typing.Generator[simpy.Event, bool, None]:
+    def _move(self) -> typing.Generator[simpy.Event, typing.Any, bool]:
         next_position = self._position.get_next_on(self._direction)
         request = self._model.map[next_position].reserve()
-        logging.info(f"{self} is waiting for {next_position} to free.")
+        logging.info("%s is waiting for %s to free.", self, next_position)
         if self.wait_time > 0:
             start_time = self._model.now
             yield self._new_abortable_event(request) | self._model.timeout(self.wait_time)
@@ -203,19 +230,20 @@ class SafeRobot(Robot["SafeCell"]):
             yield self._new_abortable_event(request)
             self.timeout = False
         if self.timeout:
-            logging.info(f"{self} waited too much ({self.wait_time}).")
+            logging.info("%s waited too much (%s).", self, self.wait_time)
         if self.timeout or self._aborted:
             self._model.map[next_position].unreserve(request)
-            return
-        logging.info(f"{self} is moving to {next_position}.")
-        self._model.record_action(
-            self, self._position, self.direction, self.mail,
-            Robot.Action.move, self._type.time_to_move,
-            next_position, self.direction, self.mail)
+            return False
+        if self._model.observers:
+            self._model.record_action(
+                self, self._position, self.direction, self.mail,
+                Robot.Action.move, self._type.time_to_move,
+                next_position, self.direction, self.mail)
         yield self._model.timeout(self._type.time_to_move)
         self._model.map[self._position].unreserve(self._cell_request)
         self._position = next_position
         self._cell_request = request
+        return True
 
     @typing.override
     def _run(self):
@@ -223,15 +251,17 @@ class SafeRobot(Robot["SafeCell"]):
         while True:
             match act := self._model.brain.get_next_action(self):
                 case Robot.Action.idle:
-                    yield self._model.process(self._idle())
+                    yield from self._idle()
                 case Robot.Action.move:
-                    yield self._model.process(self._move())
+                    yield from self._move()
                 case Robot.Action.take:
-                    yield self._model.process(self._take())
+                    yield from self._take()
                 case Robot.Action.put:
-                    yield self._model.process(self._put())
+                    yield from self._put()
                 case Robot.Action.turn_to_up | Robot.Action.turn_to_left\
                         | Robot.Action.turn_to_down | Robot.Action.turn_to_right:
-                    yield self._model.process(self._turn(Direction(act.value-10)))
-            if act is not Robot.Action.move:
+                    yield from self._turn(Direction(act.value-10))
+                case Robot.MacroAction():
+                    yield from self._macro(act)
+            if act is not Robot.Action.move and not isinstance(act, Robot.MacroAction):
                 self.timeout = False
@@ -3,7 +3,7 @@ import enum
 import typing
 
 from exceptions import PositionOutOfMap, NotRectangleMap
-from cell import Cell
+from cell import Cell, SafeCell, OccupancyGrid
 
 @dataclasses.dataclass(frozen=True, slots=True)
 class Mail:
@@ -90,19 +90,84 @@ class Map(typing.Generic[TCell]):
             raise NotRectangleMap()
         self._inputs: dict[int, Position] = {}
         self._outputs: dict[int, Position] = {}
+        # cell id is `x*m + y`
+        self._positions: list[Position] = []
+        self._cells: list[TCell] = []
         for x, line in enumerate(self._map):
             if len(line) != self._m:
                 raise NotRectangleMap()
             for y, cell in enumerate(line):
-                cell.position = Position(x, y)
+                position = Position(x, y)
+                self._positions.append(position)
+                self._cells.append(cell)
+                cell.position = position
                 if cell.input_id is not None:
-                    self._inputs[cell.input_id] = Position(x, y)
+                    self._inputs[cell.input_id] = position
                 if cell.output_id is not None:
-                    self._outputs[cell.output_id] = Position(x, y)
+                    self._outputs[cell.output_id] = position
+        self._free_positions = tuple(
+            position for position, cell in zip(self._positions, self._cells) if cell.free)
+        # `SafeCell`s share one occupancy of the map,
+        # cells copied from another map of the same layout keep its occupancy
+        safe_cells = [(cell_id, cell) for cell_id, cell in enumerate(self._cells)
+                      if isinstance(cell, SafeCell)]
+        self.occupancy: OccupancyGrid | None = next(
+            (cell.grid for _, cell in safe_cells if cell.grid is not None), None)
+        for cell_id, cell in safe_cells:
+            if cell.grid is None:
+                if self.occupancy is None:
+                    self.occupancy = OccupancyGrid(cell._env, len(self._cells)) # pyright: ignore[reportPrivateUsage]
+                cell.bind(self.occupancy, cell_id)
+        # for each direction value, id of free neighbor cell or -1
+        self._neighbors: tuple[tuple[int, ...], ...] = tuple(
+            tuple(self._neighbor_id(position, direction) for position in self._positions)
+            for direction in Direction)
+        # the same, but -1 if `can_go` forbids, built on first use
+        # as subclasses' `can_go` may need their own fields
+        self._successors: tuple[tuple[int, ...], ...] | None = None
 
         self.input_ids = tuple(self._inputs.keys())
         self.output_ids = tuple(self._outputs.keys())
 
+    def _neighbor_id(self, position: Position, direction: Direction):
+        next_position = position.get_next_on(direction)
+        if not self.has(next_position):
+            return -1
+        return self.cell_id(next_position)
+
+    @property
+    def size(self):
+        """number of cell ids"""
+        return self._n * self._m
+
+    def cell_id(self, position: Position) -> int:
+        return position.x * self._m + position.y
+
+    def position_of(self, cell_id: int) -> Position:
+        return self._positions[cell_id]
+
+    def cell(self, cell_id: int) -> TCell:
+        return self._cells[cell_id]
+
+    def neighbor(self, cell_id: int, direction: Direction) -> int:
+        """id of free cell next to `cell_id` on `direction` or -1"""
+        return self._neighbors[direction.value][cell_id]
+
+    def successor(self, cell_id: int, direction: Direction) -> int:
+        """id of cell where robot gets moving from `cell_id` on `direction`
+        or -1 if it can not go"""
+        return self.successors[direction.value][cell_id]
+
+    @property
+    def successors(self) -> tuple[tuple[int, ...], ...]:
+        """`successor` for each direction value and cell id"""
+        if self._successors is None:
+            self._successors = tuple(
+                tuple(-1 if neighbor == -1 or not self.can_go(position, direction) else neighbor
+                      for position, neighbor in zip(self._positions, neighbors))
+                for direction, neighbors in zip(Direction, self._neighbors))
+        return self._successors
+
     def has(self, position: Position):
         return (0 <= position.x < self._n
                 and 0 <= position.y < self._m
@@ -114,27 +179,34 @@ class Map(typing.Generic[TCell]):
     def __getitem__(self, position: tuple[int, int]) -> TCell:...
     def __getitem__(self, position: Position | tuple[int, int]):
         if isinstance(position, tuple):
-            position = Position(position[0], position[1])
-        if not self.has(position):
-            raise PositionOutOfMap(position)
-        return self._map[position.x][position.y]
+            x, y = position
+        else:
+            x, y = position.x, position.y
+        if not (0 <= x < self._n and 0 <= y < self._m and self._map[x][y].free):
+            raise PositionOutOfMap(Position(x, y))
+        return self._map[x][y]
 
     def __iter__(self) -> typing.Iterator[Position]:
-        for x in range(self.n):
-            for y in range(self.m):
-                if self._map[x][y].free:
-                    yield Position(x, y)
+        return iter(self._free_positions)
 
     def get_neighbors(self, position: Position) -> typing.Iterable[Position]:
-        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
-            if self.has(pos := Position(position.x+dx, position.y+dy)):
-                yield pos
+        cell_id = self.cell_id(position)
+        for direction in (Direction.up, Direction.down, Direction.left, Direction.right):
+            if (neighbor := self._neighbors[direction.value][cell_id]) != -1:
+                yield self._positions[neighbor]
 
     def distance(self, pos1: Position, pos2: Position):
         """ Manhattan distance `|x|+|y|`"""
         return abs(pos1.x - pos2.x) + abs(pos1.y - pos2.y)
 
+    def cell_distance(self, cell1: int, cell2: int):
+        """ Manhattan distance between cell ids"""
+        return (abs(cell1 // self._m - cell2 // self._m)
+                + abs(cell1 % self._m - cell2 % self._m))
+
     def can_go(self, position: Position, direction: Direction, /) -> bool:
+        """Called once for each free neighbor cell and direction
+        when `successors` are first used, result must not change after that"""
         return self.has(position.get_next_on(direction))
 
 @dataclasses.dataclass(frozen=True, slots=True)
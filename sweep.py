@@ -0,0 +1,214 @@
+import concurrent.futures
+import csv
+import dataclasses
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import random
+import typing
+
+import import_data
+from import_data import import_json
+from precompute import PrecomputeCache
+from structures import RobotType
+
+if typing.TYPE_CHECKING:
+    import io
+    from typing import Any
+    from brains import Brain
+    from modelling import Model
+
+Row = dict[str, typing.Any]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class SweepPoint:
+    """One run of the sweep.
+
+    `map`, `positions`, `distribution` are paths to .json configurations,
+    first `fleet_size` robots from `positions` are used,
+    `brain` is a class path as `brains.ant_brain.AntBrain`, it is created
+    with `brain_params` as keyword arguments (and `robot_type` if it accepts it).
+    Without `distribution` destinations are uniform.
+    For brains with `update` method (as `AntBrain`) it is called every `update_period`.
+    """
+    map: str
+    positions: str
+    brain: str
+    brain_params: tuple[tuple[str, typing.Any], ...] = ()
+    fleet_size: int = 1
+    robot_type: RobotType = RobotType(1, 1, 1, 1)
+    distribution: str | None = None
+    wait_time: float = -1
+    update_period: float = 0
+    time: float = 1000
+    warmup: float = 0
+    seed: int = 0
+
+    def parameters(self) -> Row:
+        """flat parameters as columns of results table"""
+        result: Row = {
+            "map": self.map,
+            "positions": self.positions,
+            "distribution": self.distribution,
+            "brain": self.brain,
+            "fleet_size": self.fleet_size,
+            **dataclasses.asdict(self.robot_type),
+            "wait_time": self.wait_time,
+            "update_period": self.update_period,
+            "time": self.time,
+            "warmup": self.warmup,
+            "seed": self.seed,
+        }
+        result.update(self.brain_params)
+        return result
+
+    def key(self) -> str:
+        """hash of parameters and content of configuration files"""
+        data = self.parameters()
+        for file in (self.map, self.positions, self.distribution):
+            if file is not None:
+                with open(file, 'rb') as f:
+                    data[file] = hashlib.sha256(f.read()).hexdigest()
+        return hashlib.sha256(
+            json.dumps(data, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+def grid(**axes: typing.Iterable[typing.Any]) -> list[Row]:
+    """all combinations of axes' values"""
+    names = tuple(axes.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def latin_hypercube(count: int, seed: int = 0,
+                    **ranges: tuple[float, float]) -> list[Row]:
+    """`count` settings from Latin hypercube sample of `ranges` (low, high),
+    value is rounded if both bounds are int"""
+    rng = random.Random(seed)
+    result: list[Row] = [{} for _ in range(count)]
+    for name, (low, high) in ranges.items():
+        strata = list(range(count))
+        rng.shuffle(strata)
+        for setting, stratum in zip(result, strata):
+            value = low + (stratum + rng.random()) / count * (high - low)
+            if isinstance(low, int) and isinstance(high, int):
+                value = round(value)
+            setting[name] = value
+    return result
+
+
+_ROBOT_TYPE_FIELDS = tuple(field.name for field in dataclasses.fields(RobotType))
+
+def points(base: SweepPoint, settings: typing.Iterable[Row],
+           replications: int = 1) -> list[SweepPoint]:
+    """points from `base` with replaced parameters for each setting and
+    `replications` seeds starting from `base.seed`.
+    Keys of setting are `SweepPoint` fields, `RobotType` fields
+    or parameters of brain."""
+    result: list[SweepPoint] = []
+    for setting in settings:
+        fields: Row = {}
+        robot_type: Row = {}
+        brain_params = dict(base.brain_params)
+        for name, value in setting.items():
+            if name in SweepPoint.__dataclass_fields__:
+                fields[name] = value
+            elif name in _ROBOT_TYPE_FIELDS:
+                robot_type[name] = value
+            else:
+                brain_params[name] = value
+        point = dataclasses.replace(base, **fields)
+        point = dataclasses.replace(
+            point,
+            robot_type=dataclasses.replace(point.robot_type, **robot_type),
+            brain_params=tuple(sorted(brain_params.items())))
+        result.extend(dataclasses.replace(point, seed=point.seed + i)
+                      for i in range(replications))
+    return result
+
+
+def _import_class(path: str) -> type:
+    module, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module), name)
+
+
+def _update_brain(model: "Model[Any, Any, Any]", period: float):
+    while True:
+        yield model.timeout(period)
+        model.brain.update()
+
+
+def build_model(point: SweepPoint,
+                precompute_dir: str | None = None) -> "Model[Any, Brain[Any, Any], Any]":
+    """builds model for `point` by `import_data.build_model`,
+    brain's `update` is called every `update_period`.
+    With `precompute_dir` tables computed from map are stored there."""
+    cache = None if precompute_dir is None else PrecomputeCache(precompute_dir)
+    model = import_data.build_model(
+        import_json(point.map), point.robot_type, import_json(point.positions),
+        None if point.distribution is None else import_json(point.distribution),
+        _import_class(point.brain), dict(point.brain_params),
+        point.fleet_size, point.wait_time, cache)
+    if point.update_period > 0 and hasattr(model.brain, "update"):
+        model.process(_update_brain(model, point.update_period))
+    return model
+
+
+def run_point(point: SweepPoint, precompute_dir: str | None = None) -> Row:
+    """runs model for `point`, returns row of results table"""
+    random.seed(point.seed)
+    model = build_model(point, precompute_dir)
+    if point.warmup > 0:
+        model.run(point.warmup)
+    delivered = model.delivered_mails
+    model.run(model.now + point.time)
+    delivered = model.delivered_mails - delivered
+    return point.parameters() | {
+        "delivered": delivered,
+        "throughput": delivered / point.time,
+    }
+
+
+def run_sweep(points: typing.Sequence[SweepPoint],
+              cache_dir: str | None = None,
+              workers: int | None = None,
+              precompute_dir: str | None = None) -> list[Row]:
+    """runs all `points` in process pool, returns rows of results in the same order.
+    If `cache_dir` is set, finished points are stored there by `SweepPoint.key`
+    and are not run again.
+    If `precompute_dir` is set, runs share tables computed from maps through it."""
+    rows: list[Row | None] = [None] * len(points)
+    to_run: dict[int, str | None] = {}
+    for i, point in enumerate(points):
+        if cache_dir is None:
+            to_run[i] = None
+            continue
+        file_name = os.path.join(cache_dir, point.key() + ".json")
+        if os.path.exists(file_name):
+            rows[i] = import_json(file_name)
+        else:
+            to_run[i] = file_name
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = {executor.submit(run_point, points[i], precompute_dir): i for i in to_run}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            rows[i] = future.result()
+            if (file_name := to_run[i]) is not None:
+                with open(file_name, 'w') as file:
+                    json.dump(rows[i], file)
+    return typing.cast(list[Row], rows)
+
+
+def write_table(rows: typing.Iterable[Row], file: "io.TextIOWrapper"):
+    """writes rows as csv, columns are union of all rows' keys"""
+    rows = list(rows)
+    columns: dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    writer = csv.DictWriter(file, tuple(columns))
+    writer.writeheader()
+    writer.writerows(rows)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def data_path(*parts: str) -> str:
+    """path to file in data directory of repository"""
+    return os.path.join(ROOT, "data", *parts)
@@ -0,0 +1,66 @@
+import collections
+import random
+
+import pytest
+
+from conftest import data_path
+from import_data import import_json, import_safe_map
+from mail_factories import RandomAlwaysReadyMail
+from maps import DirectionMap, OneWayMap
+from maps.direction_map import DirectionTable
+from modelling import Model
+from precompute import PrecomputeCache
+
+
+def one_way_map1() -> OneWayMap:
+    random.seed(0)
+    model = Model()
+    safe_map = import_safe_map(model, import_json(data_path("map1.json")),
+                               RandomAlwaysReadyMail(model, range(1, 10)))[0]
+    return OneWayMap.generate_random(safe_map)
+
+
+def distances_to(map_, goal: int) -> dict[int, int]:
+    """number of moves to `goal` from each cell, BFS by `Map.successor`"""
+    predecessors = collections.defaultdict(list)
+    for direction, successors in enumerate(map_.successors):
+        for cell, successor in enumerate(successors):
+            if successor != -1:
+                predecessors[successor].append(cell)
+    result = {goal: 0}
+    queue = [goal]
+    for cell in queue:
+        for previous in predecessors[cell]:
+            if previous not in result:
+                result[previous] = result[cell] + 1
+                queue.append(previous)
+    return result
+
+
+def test_shortest_directions_lead_to_destination_by_shortest_path():
+    map_ = one_way_map1()
+    table = DirectionTable.shortest(map_, map_.outputs)
+    for id_, position in map_.outputs.items():
+        goal = map_.cell_id(position)
+        distances = distances_to(map_, goal)
+        for cell in range(map_.size):
+            if cell == goal:
+                continue
+            if cell not in distances:
+                with pytest.raises(KeyError):
+                    table.direction(id_, cell)
+                continue
+            next_ = map_.successor(cell, table.direction(id_, cell))
+            assert distances[next_] == distances[cell] - 1
+
+
+def test_cached_tables_are_the_same(tmp_path):
+    map_ = one_way_map1()
+    cache = PrecomputeCache(str(tmp_path))
+    generated = DirectionMap.generate_shortest(map_, cache)
+    assert len(list(tmp_path.iterdir())) == 2
+    loaded = DirectionMap.generate_shortest(map_, cache)
+    assert bytes(loaded.to_inputs.data) == bytes(generated.to_inputs.data)
+    assert bytes(loaded.to_outputs.data) == bytes(generated.to_outputs.data)
+    position = next(iter(map_))
+    assert dict(loaded[position].to_outputs) == dict(generated[position].to_outputs)
@@ -0,0 +1,72 @@
+import heapq
+
+import pytest
+
+from brains.distance_table import DistanceTable, INF
+from cell import Cell
+from conftest import data_path
+from import_data import import_json, import_map
+from mail_factories import RandomAlwaysReadyMail
+from maps import OneWayMap
+from modelling import Model
+from structures import Direction, RobotType
+
+
+def map1():
+    model = Model()
+    return import_map(model, import_json(data_path("map1.json")),
+                      RandomAlwaysReadyMail(model, range(1, 10)))[0]
+
+
+def forward_distance(map_, robot_type: RobotType, cell: int, direction: Direction, goal: int):
+    """Dijkstra from state to goal by `Map.successor`"""
+    queue = [(0, cell, direction.value)]
+    seen = set()
+    while queue:
+        time, cell, direction = heapq.heappop(queue)
+        if cell == goal:
+            return time
+        if (cell, direction) in seen:
+            continue
+        seen.add((cell, direction))
+        if (next_ := map_.successor(cell, Direction(direction))) != -1:
+            heapq.heappush(queue, (time + robot_type.time_to_move, next_, direction))
+        for new_direction in range(4):
+            if new_direction != direction:
+                turns = 2 if (new_direction - direction) % 4 == 2 else 1
+                heapq.heappush(queue, (time + turns*robot_type.time_to_turn, cell, new_direction))
+    return INF
+
+
+@pytest.mark.parametrize("one_way", [False, True])
+def test_distances_are_shortest(one_way: bool):
+    map_ = map1()
+    if one_way:
+        map_ = OneWayMap.generate_random(map_)
+    robot_type = RobotType(2, 3, 1, 1)
+    table = DistanceTable(map_, robot_type)
+    cells = [map_.cell_id(position) for position in map_]
+    for goal in cells[::7]:
+        for cell in cells[::5]:
+            for direction in Direction:
+                assert table.distance(cell, direction, goal) \
+                    == forward_distance(map_, robot_type, cell, direction, goal)
+
+
+def test_keeps_at_most_max_goals():
+    map_ = map1()
+    table = DistanceTable(map_, RobotType(1, 1, 1, 1), max_goals=2)
+    cells = [map_.cell_id(position) for position in map_]
+    first = table(cells[0])
+    second = table(cells[1])
+    assert table(cells[0]) is first
+    table(cells[2])
+    assert table(cells[0]) is first
+    assert table(cells[1]) is not second
+
+
+def test_min_distance():
+    map_ = map1()
+    table = DistanceTable(map_, RobotType(1, 1, 1, 1))
+    cell = map_.cell_id(next(iter(map_)))
+    assert table.min_distance(cell, cell) == 0
@@ -0,0 +1,82 @@
+import io
+import random
+
+import pytest
+
+from brains.random_brain import RandomBrain
+from conftest import data_path
+from frame_log import FrameReader, FrameWriter
+from import_data import import_json, import_map
+from mail_factories import RandomAlwaysReadyMail
+from modelling import Model
+from robot import Robot
+from structures import Direction, Position, RobotType
+
+STARTS = [Position(2, 2), Position(2, 4), Position(2, 6), Position(3, 3)]
+
+
+def random_model() -> Model:
+    random.seed(5)
+    model = Model()
+    robot_type = RobotType(1, 2, 3, 2)
+    mail_factory = RandomAlwaysReadyMail(model, range(1, 10))
+    model.set_map(import_map(model, import_json(data_path("map1-simple.json")), mail_factory)[0])
+    model.set_brain(RandomBrain(model))
+    for position in STARTS:
+        model.add_robot(Robot(model, robot_type, position, Direction.down))
+    return model
+
+
+def states(model: Model) -> list[list[int]]:
+    return [[robot.position.x, robot.position.y, robot.direction.value, int(robot.mail is not None)]
+            for robot in model.robots]
+
+
+def replay(init, changes):
+    states = [list(state) for state in init]
+    for _, time_changes in changes:
+        for i, _, *state in time_changes:
+            states[int(i)] = state
+    return states
+
+
+def test_window_restores_states(tmp_path):
+    model = random_model()
+    model.run(50)
+    start_states = states(model)
+    path = tmp_path / "record.jsonl"
+    model.record(300, str(path), keyframe_period=40)
+    with open(path) as file:
+        reader = FrameReader(file)
+        assert reader.time == 50
+        assert reader.robots == len(STARTS)
+        init, changes = reader.window()
+    assert init == start_states
+    assert changes and changes[0][0] >= 50
+    with open(path) as file:
+        middle, rest = FrameReader(file).window(185)
+    assert all(time >= 185 for time, _ in rest)
+    assert replay(middle, rest) == replay(init, changes)
+
+
+def test_window_needs_keyframe(tmp_path):
+    model = random_model()
+    path = tmp_path / "record.jsonl"
+    model.record(10, str(path))
+    with open(path) as file:
+        with pytest.raises(ValueError):
+            FrameReader(file).window(-1)
+
+
+def test_turn_by_180_is_split():
+    model = random_model()
+    robot = model.robots[0]
+    file = io.StringIO()
+    writer = FrameWriter(file, model.robots)
+    writer.on_action(0, robot, robot.position, Direction.down, None,
+                     Robot.Action.turn_to_up, 4, robot.position, Direction.up, None)
+    writer.flush()
+    file.seek(0)
+    _, changes = FrameReader(file).window()
+    assert [(time, change[1], change[4]) for time, [change] in changes] == [
+        (0, 2, (Direction.down.value + 1) % 4), (2, 2, Direction.up.value)]
@@ -0,0 +1,43 @@
+import random
+
+from brains import AntBrain
+from conftest import data_path
+from import_data import import_json, import_safe_map
+from mail_factories import RandomAlwaysReadyMail
+from modelling import Model
+from robot import SafeRobot
+from structures import Direction, Position, RobotType
+
+
+def ant_model() -> Model:
+    random.seed(0)
+    model = Model()
+    mail_factory = RandomAlwaysReadyMail(model, range(2))
+    model.set_map(import_safe_map(model, import_json(data_path("small_map.json")), mail_factory)[0])
+    robot_type = RobotType(1, 1, 1, 1)
+    model.set_brain(AntBrain(model, robot_type, 0, 1.1, 0.5, 10))
+    for i in range(3):
+        model.add_robot(SafeRobot(model, robot_type, Position(0, i), Direction.down, 0.5))
+    return model
+
+
+def test_run_for_mails_stops_at_count():
+    model = ant_model()
+    model.run_for_mails(5)
+    assert model.delivered_mails == 5
+
+
+def test_run_for_mails_does_not_run_if_count_is_reached():
+    model = ant_model()
+    model.run_for_mails(3)
+    now = model.now
+    model.run_for_mails(2)
+    assert model.now == now
+    assert model.delivered_mails == 3
+
+
+def test_run_for_mails_continues():
+    model = ant_model()
+    model.run_for_mails(2)
+    model.run_for_mails(6)
+    assert model.delivered_mails == 6
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from brains.path_brain import PathBrain
+from conftest import data_path
+from import_data import import_json, import_map
+from mail_factories import RandomAlwaysReadyMail
+from modelling import Model
+from robot import Robot
+from structures import Direction, Position, RobotType
+
+STARTS = [Position(2, 2), Position(2, 4), Position(2, 6), Position(3, 3),
+          Position(3, 5), Position(4, 2), Position(4, 6)]
+
+
+def path_model(**brain_parameters) -> Model:
+    random.seed(3)
+    model = Model()
+    robot_type = RobotType(1, 2, 3, 2)
+    mail_factory = RandomAlwaysReadyMail(model, range(1, 10))
+    model.set_map(import_map(model, import_json(data_path("map1-simple.json")), mail_factory)[0])
+    model.set_brain(PathBrain(model, robot_type, **brain_parameters))
+    for position in STARTS:
+        model.add_robot(Robot(model, robot_type, position, Direction.down))
+    return model
+
+
+@pytest.mark.parametrize("window", [float('inf'), 10, 20])
+def test_robots_deliver_mails(window: float):
+    model = path_model(window=window)
+    model.run(300)
+    assert model.delivered_mails > 20
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        path_model(window=0)
+
+
+@pytest.mark.parametrize("window", [float('inf'), 10])
+def test_macro_actions_keep_results(window: float):
+    plain = path_model(window=window)
+    plain.run(300)
+    macro = path_model(window=window, macro_actions=True)
+    macro.run(300)
+    assert macro.delivered_mails == plain.delivered_mails
+
+
+def test_macro_action_must_move():
+    with pytest.raises(ValueError):
+        Robot.MacroAction(Direction.up, 0)
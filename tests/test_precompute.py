@@ -0,0 +1,59 @@
+import array
+import os
+import time
+
+from brains.distance_table import DistanceTable
+from conftest import data_path
+from import_data import import_json, import_map
+from mail_factories import RandomAlwaysReadyMail
+from modelling import Model
+from precompute import PrecomputeCache, map_key
+from structures import RobotType
+
+
+def map1():
+    model = Model()
+    return import_map(model, import_json(data_path("map1.json")),
+                      RandomAlwaysReadyMail(model, range(1, 10)))[0]
+
+
+def test_stored_array_is_loaded(tmp_path):
+    cache = PrecomputeCache(str(tmp_path))
+    computed = cache.get("a", 'd', lambda: array.array('d', [1.0, 2.5]))
+    loaded = cache.get("a", 'd', lambda: array.array('d', [0.0]))
+    assert list(computed) == list(loaded) == [1.0, 2.5]
+
+
+def test_empty_array(tmp_path):
+    cache = PrecomputeCache(str(tmp_path))
+    cache.get("a", 'B', lambda: array.array('B'))
+    assert len(cache.get("a", 'B', lambda: array.array('B', [1]))) == 0
+
+
+def test_least_recently_used_files_are_removed(tmp_path):
+    cache = PrecomputeCache(str(tmp_path), max_size=2 * 800)
+    for name in ("a", "b"):
+        cache.get(name, 'd', lambda: array.array('d', [0.0]) * 100)
+    past = time.time() - 10
+    os.utime(tmp_path / "a.d.bin", (past, past))
+    os.utime(tmp_path / "b.d.bin", (past - 10, past - 10))
+    cache.get("a", 'd', lambda: array.array('d', [1.0]))
+    cache.get("c", 'd', lambda: array.array('d', [0.0]) * 100)
+    assert sorted(os.listdir(tmp_path)) == ["a.d.bin", "c.d.bin"]
+    assert cache.size() <= cache.max_size
+
+
+def test_map_key_depends_on_robot_type():
+    map_ = map1()
+    assert map_key(map_) == map_key(map1())
+    assert map_key(map_, RobotType(1, 1, 1, 1)) != map_key(map_, RobotType(1, 2, 1, 1))
+
+
+def test_distance_table_uses_cache(tmp_path):
+    map_ = map1()
+    robot_type = RobotType(1, 2, 1, 1)
+    goal = map_.cell_id(next(iter(map_)))
+    computed = DistanceTable(map_, robot_type, cache=PrecomputeCache(str(tmp_path)))(goal)
+    assert len(os.listdir(tmp_path)) == 1
+    loaded = DistanceTable(map_, robot_type, cache=PrecomputeCache(str(tmp_path)))(goal)
+    assert list(loaded) == list(computed)
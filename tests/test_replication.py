@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from conftest import ROOT, data_path
+from import_data import import_json
+from replication import ModelConfig, ReplicationResult, _t_quantile, replicate, run_replica
+
+
+def config() -> ModelConfig:
+    return ModelConfig(
+        import_json(data_path("small_map.json")),
+        import_json(data_path("example", "robot-type.json")),
+        import_json(data_path("example", "position.json")),
+        import_json(data_path("example", "distribution.json")),
+        os.path.join(ROOT, "brains", "random_brain.py"))
+
+
+@pytest.mark.parametrize("p, df, expected", [
+    (0.975, 1, 12.706),
+    (0.975, 2, 4.303),
+    (0.975, 3, 3.182),
+    (0.975, 5, 2.571),
+    (0.975, 10, 2.228),
+    (0.975, 30, 2.042),
+    (0.995, 10, 3.169),
+])
+def test_t_quantile(p: float, df: int, expected: float):
+    assert _t_quantile(p, df) == pytest.approx(expected, rel=2e-3)
+
+
+def test_confidence_interval_is_wider_than_normal():
+    result = ReplicationResult((10, 12, 14), (0, 1, 2), 100)
+    low, high = result.confidence_interval()
+    assert (low + high) / 2 == pytest.approx(12)
+    assert (high - low) / 2 == pytest.approx(4.303 * 2 / 3 ** 0.5, rel=1e-3)
+
+
+def test_run_replica_is_reproducible():
+    assert run_replica(config(), 3, 200) == run_replica(config(), 3, 200)
+
+
+def test_run_replica_with_warmup():
+    assert run_replica(config(), 0, 100, warmup=50) >= 0
+
+
+def test_replicate_uses_consecutive_seeds():
+    result = replicate(config(), 200, 3, seed=5, workers=2)
+    assert result.seeds == (5, 6, 7)
+    assert result.delivered == tuple(run_replica(config(), seed, 200) for seed in (5, 6, 7))
+
+
+def test_replicate_needs_two_replications():
+    with pytest.raises(ValueError):
+        replicate(config(), 200, 1)
@@ -0,0 +1,32 @@
+import pytest
+
+from cell import SafeCell
+from conftest import data_path
+from exceptions import UnknownRequest
+from import_data import import_json, import_safe_map
+from mail_factories import RandomAlwaysReadyMail
+from maps import OneWayMap
+from modelling import Model
+
+
+def test_copied_map_keeps_occupancy():
+    model = Model()
+    safe_map = import_safe_map(model, import_json(data_path("map1.json")),
+                               RandomAlwaysReadyMail(model, range(1, 10)))[0]
+    way_map = OneWayMap.generate_random(safe_map)
+    assert safe_map.occupancy is not None
+    assert way_map.occupancy is safe_map.occupancy
+    position = next(iter(safe_map))
+    cell_id = safe_map.cell_id(position)
+    request = way_map[position].reserve()
+    assert safe_map.occupancy.occupied[cell_id]
+    way_map[position].unreserve(request)
+    assert not safe_map.occupancy.occupied[cell_id]
+
+
+def test_unbound_cell_raises():
+    cell = SafeCell(Model())
+    with pytest.raises(UnknownRequest):
+        cell.reserve()
+    with pytest.raises(UnknownRequest):
+        cell.unreserve(Model().event())
@@ -0,0 +1,88 @@
+import dataclasses
+import io
+import json
+
+import pytest
+
+from conftest import data_path
+from sweep import SweepPoint, grid, latin_hypercube, points, run_point, run_sweep, write_table
+
+
+def base(brain: str = "brains.ant_brain.AntBrain", **fields) -> SweepPoint:
+    params = (("q", 0), ("p", 1.1), ("rho", 0.5), ("Q", 10)) \
+        if brain == "brains.ant_brain.AntBrain" else ()
+    return SweepPoint(
+        map=data_path("small_map.json"),
+        positions=data_path("example", "position.json"),
+        brain=brain,
+        brain_params=params,
+        wait_time=0.5,
+        time=200,
+        **fields)
+
+
+def test_grid():
+    assert grid(a=(1, 2), b=("x",)) == [{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]
+
+
+def test_latin_hypercube_takes_each_stratum_once():
+    settings = latin_hypercube(4, a=(0.0, 1.0), b=(0, 40))
+    assert sorted(int(setting["a"] * 4) for setting in settings) == [0, 1, 2, 3]
+    assert all(isinstance(setting["b"], int) for setting in settings)
+
+
+def test_points_split_setting():
+    result = points(base(), [{"fleet_size": 2, "time_to_move": 3, "p": 2}], replications=2)
+    assert [point.seed for point in result] == [0, 1]
+    assert result[0].fleet_size == 2
+    assert result[0].robot_type.time_to_move == 3
+    assert dict(result[0].brain_params)["p"] == 2
+
+
+def test_key_depends_on_parameters():
+    assert base().key() == base().key()
+    assert base().key() != base(seed=1).key()
+
+
+@pytest.mark.parametrize("brain", [
+    "brains.ant_brain.AntBrain",
+    "brains.random_brain.RandomBrain",
+])
+def test_run_point_is_reproducible(brain: str):
+    point = base(brain, fleet_size=2, warmup=50)
+    row = run_point(point)
+    assert row == run_point(point)
+    assert row["fleet_size"] == 2
+    assert row["throughput"] == row["delivered"] / point.time
+
+
+def test_run_point_path_brain_rests_at_start(tmp_path):
+    positions = tmp_path / "position.json"
+    positions.write_text(json.dumps({"robots": [
+        {"x": x, "y": y, "direction": "down"} for x, y in ((2, 2), (2, 4), (3, 3))]}))
+    point = dataclasses.replace(
+        base("brains.path_brain.PathBrain"),
+        map=data_path("map1-simple.json"), positions=str(positions), fleet_size=3)
+    assert run_point(point)["delivered"] > 0
+
+
+def test_run_point_with_precompute_dir(tmp_path):
+    point = dataclasses.replace(
+        base("brains.DirectionBrain", fleet_size=3), wait_time=3, map=data_path("map1.json"))
+    assert run_point(point, str(tmp_path)) == run_point(point)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_run_point_needs_enough_robots():
+    with pytest.raises(ValueError):
+        run_point(base(fleet_size=4))
+
+
+def test_run_sweep_uses_cache(tmp_path):
+    sweep = points(base(), grid(fleet_size=(1, 2)))
+    rows = run_sweep(sweep, cache_dir=str(tmp_path), workers=2)
+    assert len(list(tmp_path.iterdir())) == 2
+    assert run_sweep(sweep, cache_dir=str(tmp_path), workers=2) == rows
+    output = io.StringIO()
+    write_table(rows, output)
+    assert output.getvalue().splitlines()[0].startswith("map,")
@@ -1,22 +1,21 @@
-function update(time){
-    for (let i = 0; i < robots.length; i++) {
-        if (data[time][i][0] == 0) continue;
-        x = data[time][i][2]*MOVE + CELL_SIZE/2;
-        y = data[time][i][1]*MOVE + CELL_SIZE/2;
-        if (data[time][i][3] == ((rotations[i]+1)%4+4)%4){
+function update(changes){
+    for (const [i, duration, row, column, direction, mail] of changes) {
+        x = column*MOVE + CELL_SIZE/2;
+        y = row*MOVE + CELL_SIZE/2;
+        if (direction == ((rotations[i]+1)%4+4)%4){
             rotations[i] += 1;
         }
-        else if (data[time][i][3] == ((rotations[i]+3)%4+4)%4){
+        else if (direction == ((rotations[i]+3)%4+4)%4){
             rotations[i] -= 1;
         }
-        else if (data[time][i][3] == ((rotations[i]+2)%4+4)%4){
+        else if (direction == ((rotations[i]+2)%4+4)%4){
             rotations[i] += 2;
         }
-        robots[i].setAttribute("style", "transition: "+SPEED*data[time][i][0]+"s")
-        robots[i].getElementsByClassName("mail")[0].setAttribute("style", "transition: "+SPEED*data[time][i][0]+"s")
+        robots[i].setAttribute("style", "transition: "+SPEED*duration+"s")
+        robots[i].getElementsByClassName("mail")[0].setAttribute("style", "transition: "+SPEED*duration+"s")
         robots[i].setAttribute("transform", "translate("+x+","+y+")\
         rotate(" + (-90*rotations[i]) + ")");
-        if (data[time][i][4]){
+        if (mail){
             robots[i].setAttribute("mail", "true");
         }
         else{
@@ -26,10 +25,10 @@ function update(time){
 }
 robots = [];
 rotations = [];
-for (let i = 0; i < data[0].length; i++) {
+for (let i = 0; i < init.length; i++) {
     robots.push(document.getElementById("r"+i));
-    rotations.push(data[0][i][3]);
+    rotations.push(init[i][2]);
 }
-for (let i = 0; i < data.length; i++) {
-    setTimeout(update, i*1000*SPEED, i);
+for (const [time, changes] of data) {
+    setTimeout(update, time*1000*SPEED, changes);
 }
\ No newline at end of file